@@ -0,0 +1,155 @@
+import bisect
+import re
+import frappe
+from frappe import _
+from frappe.utils import cint
+from erpnext_crm_api.api.utils import api_response, api_error
+
+
+# ---------------------------------------------------------
+# AUTOCOMPLETE SOURCES (SMALL MASTER TABLES)
+# fields → returned per row
+# search → columns whose values (and each word in them) are prefix keys
+# filters → optional get_all filters for the indexed rows
+# ---------------------------------------------------------
+AUTOCOMPLETE_SOURCES = {
+    "Country": {"fields": ["name", "code"], "search": ["name", "code"]},
+    "Territory": {"fields": ["name", "parent_territory", "is_group"], "search": ["name"]},
+    "Industry Type": {"fields": ["name"], "search": ["name"]},
+    "Language": {
+        "fields": ["name", "language_name", "language_code", "enabled"],
+        "search": ["language_name", "language_code"],
+        "filters": {"enabled": 1}
+    },
+    "Campaign": {"fields": ["name", "campaign_name"], "search": ["name", "campaign_name"]},
+    "Market Segment": {"fields": ["name"], "search": ["name"]},
+    "Sales Stage": {"fields": ["name"], "search": ["name"]},
+    "Opportunity Type": {"fields": ["name", "description"], "search": ["name"]},
+    "Gender": {"fields": ["name"], "search": ["name"]},
+    "Customer Group": {
+        "fields": ["name", "parent_customer_group", "is_group"],
+        "search": ["name"]
+    },
+}
+
+AUTOCOMPLETE_MAX_LIMIT = 50
+AUTOCOMPLETE_VERSION_KEY = "crm_api_autocomplete_version"
+
+# (site, doctype) → {"version": ..., "keys": [...], "positions": [...], "rows": [...]}
+# Per worker process; rebuilt when the shared version in redis changes.
+_indexes = {}
+
+
+def _index_keys(value):
+    """
+    Lowercased prefix keys for a value: the full value plus every
+    word-start suffix, so "United States" matches "uni" and "sta".
+    """
+    value = (value or "").strip().lower()
+    if not value:
+        return []
+
+    keys = [value]
+    for match in re.finditer(r"[\s\-_/(]+", value):
+        suffix = value[match.end():]
+        if suffix:
+            keys.append(suffix)
+
+    return keys
+
+
+def _build_index(doctype, version):
+    source = AUTOCOMPLETE_SOURCES[doctype]
+
+    rows = frappe.get_all(
+        doctype,
+        fields=source["fields"],
+        filters=source.get("filters"),
+        order_by="name asc"
+    )
+
+    entries = []
+    for position, row in enumerate(rows):
+        for field in source["search"]:
+            for key in _index_keys(str(row.get(field) or "")):
+                entries.append((key, position))
+
+    entries.sort()
+
+    return {
+        "version": version,
+        "keys": [key for key, _position in entries],
+        "positions": [position for _key, position in entries],
+        "rows": rows
+    }
+
+
+def get_index(doctype):
+    """
+    Sorted prefix index for doctype, built once per worker and
+    reused until invalidate_autocomplete bumps the version.
+    """
+    version = frappe.cache().hget(AUTOCOMPLETE_VERSION_KEY, doctype)
+    cache_key = (frappe.local.site, doctype)
+
+    index = _indexes.get(cache_key)
+    if index is None or index["version"] != version:
+        index = _build_index(doctype, version)
+        _indexes[cache_key] = index
+
+    return index
+
+
+def lookup(doctype, prefix, limit=10):
+    """
+    Rows whose search columns (or a word in them) start with prefix,
+    in name order. Empty prefix returns the first `limit` rows.
+    """
+    index = get_index(doctype)
+    prefix = (prefix or "").strip().lower()
+
+    if not prefix:
+        return [dict(row) for row in index["rows"][:limit]]
+
+    keys = index["keys"]
+    start = bisect.bisect_left(keys, prefix)
+    # every key with this prefix sorts before prefix + U+FFFF
+    end = bisect.bisect_right(keys, prefix + "\uffff", lo=start)
+
+    positions = sorted(set(index["positions"][start:end]))
+    return [dict(index["rows"][p]) for p in positions[:limit]]
+
+
+def invalidate_autocomplete(doc, method=None, *args):
+    """
+    doc_events hook: bump the doctype version after commit so every
+    worker rebuilds its index on the next lookup.
+    """
+    doctype = doc.doctype
+
+    def bump():
+        frappe.cache().hset(AUTOCOMPLETE_VERSION_KEY, doctype, frappe.generate_hash(length=10))
+
+    frappe.db.after_commit.add(bump)
+
+
+@frappe.whitelist(allow_guest=False)
+def autocomplete(doctype=None, prefix=None, limit=10):
+    """
+    API: Typeahead over master data (Country, Territory, Industry Type, ...)
+    Served from an in-memory sorted index, no DB query per keystroke
+    """
+    if doctype not in AUTOCOMPLETE_SOURCES:
+        return api_error(f"Autocomplete is not supported for {doctype}", 400)
+
+    limit = min(cint(limit) or 10, AUTOCOMPLETE_MAX_LIMIT)
+
+    return api_response(
+        data={
+            "doctype": doctype,
+            "prefix": prefix or "",
+            "data": lookup(doctype, prefix, limit)
+        },
+        message=_("Autocomplete Results Fetched Successfully"),
+        flatten=True
+    )
@@ -0,0 +1,431 @@
+import frappe
+from frappe import _
+from frappe.utils import cint, now_datetime, add_to_date
+from erpnext_crm_api.api.utils import api_response, api_error
+
+
+# ---------------------------------------------------------
+# BATCH SUBMIT / CANCEL
+# A CRM Batch Operation holds one item row per document. Items are
+# spread over `parallelism` shards, each processed by its own job on
+# the long queue; every document is committed on its own and its
+# item row records the outcome. Shards only pick up Pending /
+# Processing items, so re-enqueueing a shard resumes it.
+# ---------------------------------------------------------
+BATCH_DOCTYPE = "CRM Batch Operation"
+BATCH_ITEM_DOCTYPE = "CRM Batch Operation Item"
+
+# doctype → allowed actions
+BATCH_ACTIONS = {
+    "Quotation": ["Submit", "Cancel"],
+    "Sales Order": ["Submit", "Cancel"],
+    "Delivery Note": ["Submit"],
+    "Sales Invoice": ["Submit"],
+}
+
+MAX_BATCH_DOCUMENTS = 10000
+DEFAULT_MAX_PARALLELISM = 4
+
+# a shard job is re-enqueued when its batch has not moved for this long
+STALLED_BATCH_MINUTES = 15
+
+UNFINISHED_ITEM_STATUSES = ["Pending", "Processing"]
+
+
+def get_max_parallelism():
+    """
+    Upper bound for `parallelism` from site_config `crm_api_batch_max_parallelism`.
+    """
+    return max(cint(frappe.conf.get("crm_api_batch_max_parallelism") or DEFAULT_MAX_PARALLELISM), 1)
+
+
+def parse_names(names):
+    if isinstance(names, str):
+        names = frappe.parse_json(names) if names.strip().startswith("[") else names.split(",")
+
+    if not isinstance(names, (list, tuple)):
+        return []
+
+    # keep order, drop blanks / repeats
+    return list(dict.fromkeys(str(name).strip() for name in names if str(name).strip()))
+
+
+def create_batch(doctype, action, names, parallelism=None):
+    """
+    Insert the batch and its items (items with one bulk insert).
+    """
+    parallelism = min(max(cint(parallelism) or 1, 1), get_max_parallelism(), len(names))
+
+    batch = frappe.get_doc({
+        "doctype": BATCH_DOCTYPE,
+        "reference_doctype": doctype,
+        "action": action,
+        "status": "Queued",
+        "parallelism": parallelism,
+        "total": len(names)
+    }).insert(ignore_permissions=True)
+
+    now = now_datetime()
+    user = frappe.session.user
+
+    frappe.db.bulk_insert(
+        BATCH_ITEM_DOCTYPE,
+        [
+            "name", "parent", "parenttype", "parentfield", "idx",
+            "reference_name", "shard", "status",
+            "creation", "modified", "owner", "modified_by", "docstatus"
+        ],
+        [
+            [
+                frappe.generate_hash(length=10), batch.name, BATCH_DOCTYPE, "items", idx,
+                name, (idx - 1) % parallelism, "Pending",
+                now, now, user, user, 0
+            ]
+            for idx, name in enumerate(names, start=1)
+        ]
+    )
+
+    return batch
+
+
+def enqueue_shard(batch_id, shard):
+    frappe.enqueue(
+        "erpnext_crm_api.api.batch_operation.process_batch_shard",
+        queue="long",
+        timeout=3600,
+        job_id=f"crm_api_batch_operation:{batch_id}:{shard}",
+        deduplicate=True,
+        enqueue_after_commit=True,
+        batch_id=batch_id,
+        shard=shard
+    )
+
+
+def enqueue_unfinished_shards(batch_id):
+    """
+    (Re-)enqueue every shard that still has unfinished items; running
+    shards are left alone by job_id deduplication.
+    """
+    shards = frappe.get_all(
+        BATCH_ITEM_DOCTYPE,
+        filters={"parent": batch_id, "status": ["in", UNFINISHED_ITEM_STATUSES]},
+        pluck="shard",
+        distinct=True
+    )
+    for shard in shards:
+        enqueue_shard(batch_id, shard)
+
+    return shards
+
+
+# ---------------------------------------------------------
+# PER DOCUMENT ACTIONS
+# Same rules as the single document endpoints; return a reason to
+# skip, raise to fail.
+# ---------------------------------------------------------
+def submit_document(doc):
+    if doc.docstatus == 1:
+        return "Already submitted"
+    if doc.docstatus == 2:
+        raise frappe.ValidationError(_("Cancelled documents cannot be submitted"))
+
+    if doc.doctype == "Delivery Note" and not doc.selling_price_list:
+        # as submit_delivery_note: fall back to the company price list
+        default_price_list = frappe.db.get_value("Company", doc.company, "default_price_list")
+        if not default_price_list:
+            raise frappe.ValidationError(_("No Selling Price List found"))
+        doc.selling_price_list = default_price_list
+        doc.price_list_currency = frappe.db.get_value("Price List", default_price_list, "currency")
+
+    if doc.doctype == "Sales Invoice" and doc.meta.has_field("workflow_state") and doc.workflow_state:
+        if doc.workflow_state not in ["Approved"]:
+            raise frappe.ValidationError(_("Sales Invoice must be Approved before submission"))
+
+    doc.submit()
+
+
+def cancel_document(doc):
+    if doc.docstatus == 2:
+        return "Already cancelled"
+    if doc.docstatus != 1:
+        raise frappe.ValidationError(_("Only submitted documents can be cancelled"))
+
+    doc.cancel()
+
+
+def process_item(doctype, action, reference_name):
+    doc = frappe.get_doc(doctype, reference_name)
+    if action == "Submit":
+        return submit_document(doc)
+    return cancel_document(doc)
+
+
+def set_item_status(item_name, status, error=None):
+    frappe.db.set_value(
+        BATCH_ITEM_DOCTYPE,
+        item_name,
+        {"status": status, "error": error, "processed_at": now_datetime()},
+        update_modified=False
+    )
+
+
+def process_batch_shard(batch_id, shard):
+    """
+    Background job: process the shard's unfinished items in order.
+    An item left in Processing by a dead worker is retried; documents
+    already in the target state are recorded as Skipped.
+
+    Runs as the batch owner, also when re-enqueued by the scheduler
+    (resume_stalled_batches), so permissions and audit fields match
+    a single document submit / cancel.
+    """
+    batch = frappe.db.get_value(
+        BATCH_DOCTYPE, batch_id, ["owner", "reference_doctype", "action", "status"], as_dict=True
+    )
+    if not batch or batch.status in ("Completed", "Completed with Errors"):
+        return
+
+    frappe.set_user(batch.owner)
+
+    frappe.db.sql(
+        """
+        UPDATE `tabCRM Batch Operation`
+        SET status = 'Running', started_at = IFNULL(started_at, %(now)s), modified = %(now)s
+        WHERE name = %(batch)s
+        """,
+        {"batch": batch_id, "now": now_datetime()}
+    )
+    frappe.db.commit()
+
+    items = frappe.get_all(
+        BATCH_ITEM_DOCTYPE,
+        filters={
+            "parent": batch_id,
+            "shard": cint(shard),
+            "status": ["in", UNFINISHED_ITEM_STATUSES]
+        },
+        fields=["name", "reference_name"],
+        order_by="idx asc"
+    )
+
+    for item in items:
+        set_item_status(item.name, "Processing")
+        frappe.db.commit()
+
+        try:
+            skip_reason = process_item(batch.reference_doctype, batch.action, item.reference_name)
+            # document and outcome are committed together
+            set_item_status(item.name, "Skipped" if skip_reason else "Success", skip_reason)
+
+        except Exception as e:
+            frappe.db.rollback()
+            frappe.clear_messages()
+            set_item_status(item.name, "Failed", str(e) or e.__class__.__name__)
+
+        # heartbeat: a moving batch is never treated as stalled
+        frappe.db.sql(
+            "UPDATE `tabCRM Batch Operation` SET modified = %(now)s WHERE name = %(batch)s",
+            {"batch": batch_id, "now": now_datetime()}
+        )
+        frappe.db.commit()
+
+    finalize_batch(batch_id)
+
+
+def get_item_counts(batch_id):
+    return dict(frappe.db.sql(
+        """
+        SELECT status, COUNT(*)
+        FROM `tabCRM Batch Operation Item`
+        WHERE parent = %(batch)s
+        GROUP BY status
+        """,
+        {"batch": batch_id}
+    ))
+
+
+def finalize_batch(batch_id):
+    """
+    Close the batch once no shard has unfinished items (idempotent).
+    """
+    counts = get_item_counts(batch_id)
+    if any(counts.get(status) for status in UNFINISHED_ITEM_STATUSES):
+        return
+
+    frappe.db.sql(
+        """
+        UPDATE `tabCRM Batch Operation`
+        SET status = %(status)s,
+            succeeded = %(succeeded)s,
+            failed = %(failed)s,
+            skipped = %(skipped)s,
+            finished_at = IFNULL(finished_at, %(now)s),
+            modified = %(now)s
+        WHERE name = %(batch)s
+        """,
+        {
+            "batch": batch_id,
+            "status": "Completed with Errors" if counts.get("Failed") else "Completed",
+            "succeeded": counts.get("Success", 0),
+            "failed": counts.get("Failed", 0),
+            "skipped": counts.get("Skipped", 0),
+            "now": now_datetime()
+        }
+    )
+    frappe.db.commit()
+
+
+def resume_stalled_batches():
+    """
+    Scheduler: re-enqueue shards of batches that stopped moving
+    (worker died / job lost).
+    """
+    stalled = frappe.get_all(
+        BATCH_DOCTYPE,
+        filters={
+            "status": ["in", ["Queued", "Running"]],
+            "modified": ["<", add_to_date(now_datetime(), minutes=-STALLED_BATCH_MINUTES)]
+        },
+        pluck="name"
+    )
+    for batch_id in stalled:
+        if not enqueue_unfinished_shards(batch_id):
+            finalize_batch(batch_id)
+
+
+# ---------------------------------------------------------
+# ENDPOINTS
+# ---------------------------------------------------------
+def start_batch(doctype, action, names, parallelism):
+    if action not in BATCH_ACTIONS.get(doctype, []):
+        return api_error(f"{action} is not supported for {doctype}", 400)
+
+    names = parse_names(names)
+    if not names:
+        return api_error("names must be a non empty list", 400)
+
+    if len(names) > MAX_BATCH_DOCUMENTS:
+        return api_error(f"At most {MAX_BATCH_DOCUMENTS} documents per batch", 400)
+
+    if not frappe.has_permission(doctype, action.lower()):
+        return api_error("Not permitted", 403)
+
+    batch = create_batch(doctype, action, names, parallelism)
+    for shard in range(batch.parallelism):
+        enqueue_shard(batch.name, shard)
+
+    return api_response(
+        data={
+            "batch_id": batch.name,
+            "reference_doctype": doctype,
+            "action": action,
+            "total": batch.total,
+            "parallelism": batch.parallelism
+        },
+        message=_("Batch {0} queued").format(action),
+        status_code=202
+    )
+
+
+@frappe.whitelist(methods=["POST"])
+def batch_submit(doctype=None, names=None, parallelism=1):
+    """
+    API: Submit many Quotations / Sales Orders / Delivery Notes / Sales Invoices
+    """
+    return start_batch(doctype, "Submit", names, parallelism)
+
+
+@frappe.whitelist(methods=["POST"])
+def batch_cancel(doctype=None, names=None, parallelism=1):
+    """
+    API: Cancel many Quotations / Sales Orders
+    """
+    return start_batch(doctype, "Cancel", names, parallelism)
+
+
+def get_batch_or_error(batch_id):
+    if not batch_id:
+        return None, api_error("batch_id is required", 400)
+
+    batch = frappe.db.get_value(
+        BATCH_DOCTYPE,
+        batch_id,
+        [
+            "name", "owner", "reference_doctype", "action", "status", "parallelism",
+            "total", "started_at", "finished_at", "modified"
+        ],
+        as_dict=True
+    )
+    if not batch:
+        return None, api_error("Batch not found", 404)
+
+    if batch.owner != frappe.session.user and "System Manager" not in frappe.get_roles():
+        return None, api_error("Not permitted", 403)
+
+    return batch, None
+
+
+@frappe.whitelist()
+def get_batch_operation_status(batch_id=None, include_items=0):
+    """
+    API: Progress of a batch; failed items always, every item with include_items=1
+    """
+    batch, error = get_batch_or_error(batch_id)
+    if error:
+        return error
+
+    counts = get_item_counts(batch_id)
+    done = sum(counts.get(status, 0) for status in ("Success", "Failed", "Skipped"))
+
+    item_filters = {"parent": batch_id}
+    if not cint(include_items):
+        item_filters["status"] = "Failed"
+
+    items = frappe.get_all(
+        BATCH_ITEM_DOCTYPE,
+        filters=item_filters,
+        fields=["reference_name", "status", "error", "processed_at"],
+        order_by="idx asc"
+    )
+
+    return api_response(
+        data={
+            "batch_id": batch.name,
+            "reference_doctype": batch.reference_doctype,
+            "action": batch.action,
+            "status": batch.status,
+            "parallelism": batch.parallelism,
+            "total": batch.total,
+            "counts": {
+                "pending": counts.get("Pending", 0),
+                "processing": counts.get("Processing", 0),
+                "success": counts.get("Success", 0),
+                "failed": counts.get("Failed", 0),
+                "skipped": counts.get("Skipped", 0)
+            },
+            "progress": round(done * 100 / batch.total, 2) if batch.total else 100,
+            "started_at": batch.started_at,
+            "finished_at": batch.finished_at,
+            "items": items
+        },
+        message=_("Batch Status Fetched Successfully")
+    )
+
+
+@frappe.whitelist(methods=["POST"])
+def resume_batch_operation(batch_id=None):
+    """
+    API: Re-enqueue the unfinished shards of a batch
+    """
+    batch, error = get_batch_or_error(batch_id)
+    if error:
+        return error
+
+    shards = enqueue_unfinished_shards(batch_id)
+    if not shards:
+        finalize_batch(batch_id)
+
+    return api_response(
+        data={"batch_id": batch_id, "resumed_shards": shards},
+        message=_("Batch Resumed") if shards else _("Nothing to resume")
+    )
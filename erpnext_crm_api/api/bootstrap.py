@@ -0,0 +1,164 @@
+import hashlib
+import frappe
+from frappe import _
+from erpnext_crm_api.api.utils import api_response, api_error
+from erpnext_crm_api.api.master_cache import get_doctype_prefix, get_cache_ttl
+
+
+# ---------------------------------------------------------
+# BOOTSTRAP LISTS
+# Same columns and default order as the individual list endpoints,
+# without pagination. Optional "filters" restrict the rows.
+# ---------------------------------------------------------
+BOOTSTRAP_LISTS = {
+    "genders": {
+        "doctype": "Gender",
+        "fields": ["name"],
+        "order_by": "name asc"
+    },
+    "countries": {
+        "doctype": "Country",
+        "fields": ["name", "code", "date_format", "time_format", "time_zones"],
+        "order_by": "name asc"
+    },
+    "territories": {
+        "doctype": "Territory",
+        "fields": ["name", "parent_territory", "is_group", "lft", "rgt"],
+        "order_by": "lft asc"
+    },
+    "languages": {
+        "doctype": "Language",
+        "fields": ["name", "language_name", "language_code", "enabled"],
+        "filters": {"enabled": 1},
+        "order_by": "language_name asc"
+    },
+    "industries": {
+        "doctype": "Industry Type",
+        "fields": ["name"],
+        "order_by": "name asc"
+    },
+    "market_segments": {
+        "doctype": "Market Segment",
+        "fields": ["name"],
+        "order_by": "name asc"
+    },
+    "sales_stages": {
+        "doctype": "Sales Stage",
+        "fields": ["name", "idx"],
+        "order_by": "idx asc"
+    },
+    "opportunity_types": {
+        "doctype": "Opportunity Type",
+        "fields": ["name", "description"],
+        "order_by": "name asc"
+    },
+    "campaigns": {
+        "doctype": "Campaign",
+        "fields": ["name", "campaign_name", "owner"],
+        "order_by": "creation desc"
+    },
+    "companies": {
+        "doctype": "Company",
+        "fields": [
+            "name", "company_name", "abbr", "default_currency",
+            "country", "is_group", "parent_company"
+        ],
+        "order_by": "company_name asc"
+    },
+    "customer_groups": {
+        "doctype": "Customer Group",
+        "fields": ["name", "parent_customer_group", "is_group"],
+        "order_by": "name asc"
+    },
+    "crm_masters": {
+        "doctype": "CRM Master",
+        "fields": ["master", "key", "value", "sorting_order"],
+        "order_by": "sorting_order asc"
+    },
+}
+
+
+def get_bootstrap_list(list_name):
+    """
+    {"hash": ..., "data": [...]} for one list.
+
+    Stored under the doctype's master cache prefix, so the master_cache
+    doc_events invalidation also refreshes the bootstrap copy.
+    """
+    spec = BOOTSTRAP_LISTS[list_name]
+    key = f"{get_doctype_prefix(spec['doctype'])}bootstrap:{list_name}"
+
+    entry = frappe.cache().get_value(key)
+    if entry is not None:
+        return entry
+
+    data = frappe.get_all(
+        spec["doctype"],
+        fields=spec["fields"],
+        filters=spec.get("filters"),
+        order_by=spec["order_by"]
+    )
+    entry = {
+        "hash": hashlib.md5(frappe.as_json(data).encode()).hexdigest(),
+        "data": data
+    }
+
+    ttl = get_cache_ttl()
+    if ttl > 0:
+        frappe.cache().set_value(key, entry, expires_in_sec=ttl)
+
+    return entry
+
+
+@frappe.whitelist(allow_guest=False)
+def bootstrap_masters(hashes=None, lists=None):
+    """
+    API: All master dropdown lists in one call
+
+    hashes → {"countries": "<hash>", ...} from a previous response;
+             lists whose hash still matches are omitted from `data`
+    lists  → optional subset of list names (JSON list or comma separated)
+    """
+    try:
+        hashes = frappe.parse_json(hashes) if hashes else {}
+        if not isinstance(hashes, dict):
+            return api_error("hashes must be an object of list name to hash", 400)
+
+        if lists:
+            if isinstance(lists, str):
+                lists = frappe.parse_json(lists) if lists.strip().startswith("[") else lists.split(",")
+            lists = [name.strip() for name in lists if name.strip()]
+        else:
+            lists = list(BOOTSTRAP_LISTS)
+
+        unknown = [name for name in lists if name not in BOOTSTRAP_LISTS]
+        if unknown:
+            return api_error(f"Unknown list(s): {', '.join(unknown)}", 400)
+
+        versions = {}
+        data = {}
+        unchanged = []
+
+        for list_name in lists:
+            entry = get_bootstrap_list(list_name)
+            versions[list_name] = entry["hash"]
+
+            if hashes.get(list_name) == entry["hash"]:
+                unchanged.append(list_name)
+            else:
+                data[list_name] = entry["data"]
+
+        return api_response(
+            data={
+                "hashes": versions,
+                "unchanged": unchanged,
+                "data": data
+            },
+            message=_("Master Data Fetched Successfully"),
+            status_code=200,
+            flatten=True,
+            etag=True
+        )
+
+    except Exception as e:
+        return api_error(str(e), 500)
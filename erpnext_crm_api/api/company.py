@@ -1,9 +1,11 @@
 import frappe
 from frappe import _
-from erpnext_crm_api.api.utils import api_response, api_error
+from erpnext_crm_api.api.utils import api_response, api_error, count_records
+from erpnext_crm_api.api.master_cache import cached_master_list
 
 
 @frappe.whitelist(allow_guest=False)
+@cached_master_list("Company")
 def get_company_list(
     search=None,
     sort_by="company_name",
@@ -40,13 +42,10 @@ def get_company_list(
         ]
 
     # ✅ Total count (CORRECT WAY)
-    total_count = len(
-        frappe.get_all(
-            "Company",
-            filters=filters,
-            or_filters=or_filters,
-            pluck="name"
-        )
+    total_count, count_mode = count_records(
+        "Company",
+        filters=filters,
+        or_filters=or_filters
     )
 
     companies = frappe.get_all(
@@ -72,6 +71,7 @@ def get_company_list(
         "page": page,
         "page_size": page_size,
         "total_records": total_count,
+        "count_mode": count_mode,
         "total_pages": (total_count + page_size - 1) // page_size,
         "data": companies
     },
@@ -1,5 +1,6 @@
+import hashlib
 import frappe
-from frappe.utils import getdate, nowdate, add_months, sbool
+from frappe.utils import getdate, nowdate, add_months, sbool, now_datetime, get_datetime, cint
 
 @frappe.whitelist()
 def get_crm_dashboard(
@@ -7,12 +8,34 @@ def get_crm_dashboard(
     to_date=None,
     interval="month",
     company=None,
-    sales_person=None
+    sales_person=None,
+    refresh=0
 ):
     """
     Updated ERPNext Default CRM Dashboard API
+    Served from cache (stale-while-revalidate); refresh=1 recomputes now
     """
 
+    filters = get_dashboard_filters(from_date, to_date, interval, company, sales_person)
+
+    entry = None if sbool(refresh) else frappe.cache().get_value(get_dashboard_cache_key(filters))
+
+    if entry is None:
+        entry = compute_dashboard(filters)
+        source = "live"
+    else:
+        source = "cache"
+        if is_stale(entry):
+            enqueue_dashboard_refresh(filters)
+
+    return {
+        "filters": filters,
+        **entry["data"],
+        "freshness": get_freshness(entry, source)
+    }
+
+
+def get_dashboard_filters(from_date=None, to_date=None, interval="month", company=None, sales_person=None):
     today = getdate(nowdate())
 
     # Default date range → Last Quarter (ERPNext default)
@@ -22,229 +45,283 @@ def get_crm_dashboard(
     if not from_date:
         from_date = add_months(to_date, -3)
 
-    filters = {
-        "from_date": from_date,
-        "to_date": to_date,
-        "company": company,
-        "sales_person": sales_person,
-        "interval": interval
-    }
-
     return {
-        "filters": filters,
-        "kpi_cards": get_kpi_cards(filters),
-        "charts": {
-            "incoming_leads": get_incoming_leads(filters),
-            "opportunity_trends": get_opportunity_trends(filters),
-            "won_opportunities": get_won_opportunities(filters),
-            "territory_opportunity": get_territory_opportunity(filters),
-            "campaign_opportunity": get_campaign_opportunity(filters),
-            "territory_sales": get_territory_sales(filters),
-            "lead_source": get_lead_source(filters)
-        }
+        "from_date": str(getdate(from_date)),
+        "to_date": str(getdate(to_date)),
+        "company": company or None,
+        "sales_person": sales_person or None,
+        "interval": interval or "month",
+        "owner_user": get_sales_person_user(sales_person)
     }
 
 
+# ---------------------------------------------------------
+# DASHBOARD CACHE (STALE-WHILE-REVALIDATE)
+# Entries are served until they expire; once older than the fresh
+# window they are still served and a background refresh is enqueued.
+# ---------------------------------------------------------
+DASHBOARD_CACHE_PREFIX = "crm_api_dashboard"
+DEFAULT_FRESH_SECONDS = 300
+DASHBOARD_CACHE_EXPIRY = 86400
 
+# Interval(s) precomputed per company for the default (last quarter) range
+PRECOMPUTE_INTERVALS = ["month"]
 
 
+def get_fresh_seconds():
+    """
+    Fresh window from site_config `crm_api_dashboard_fresh_seconds`.
+    """
+    return cint(frappe.conf.get("crm_api_dashboard_fresh_seconds") or DEFAULT_FRESH_SECONDS)
 
 
-def get_kpi_cards(filters):
-    conditions = []
-    values = {}
-
-    if filters.get("company"):
-        conditions.append("company = %(company)s")
-        values["company"] = filters["company"]
+def get_dashboard_cache_key(filters):
+    parts = [
+        filters["from_date"], filters["to_date"], filters["interval"],
+        filters["company"] or "", filters["sales_person"] or ""
+    ]
+    return f"{DASHBOARD_CACHE_PREFIX}:{hashlib.md5('|'.join(parts).encode()).hexdigest()}"
 
-    cond_sql = " AND ".join(conditions)
-    cond_sql = f"AND {cond_sql}" if cond_sql else ""
 
-    return {
-        "new_leads": frappe.db.sql(
-            f"""
-            SELECT COUNT(name)
-            FROM `tabLead`
-            WHERE creation BETWEEN %(from_date)s AND %(to_date)s
-            """,
-            filters,
-        )[0][0],
-
-        "new_opportunities": frappe.db.sql(
-            f"""
-            SELECT COUNT(name)
-            FROM `tabOpportunity`
-            WHERE creation BETWEEN %(from_date)s AND %(to_date)s
-            {cond_sql}
-            """,
-            {**filters, **values},
-        )[0][0],
-
-        "won_opportunities": frappe.db.sql(
-            f"""
-            SELECT COUNT(name)
-            FROM `tabOpportunity`
-            WHERE status = 'Closed'
-              AND creation BETWEEN %(from_date)s AND %(to_date)s
-            {cond_sql}
-            """,
-            {**filters, **values},
-        )[0][0],
-
-        "open_opportunities": frappe.db.count(
-            "Opportunity",
-            {
-                "status": ["not in", ["Closed", "Lost"]],
-                "company": filters.get("company"),
-            },
-        ),
+def compute_dashboard(filters):
+    """
+    Build the dashboard and store it in cache; returns the cache entry.
+    """
+    entry = {
+        "computed_at": now_datetime(),
+        "data": build_dashboard(filters)
     }
+    frappe.cache().set_value(
+        get_dashboard_cache_key(filters),
+        entry,
+        expires_in_sec=DASHBOARD_CACHE_EXPIRY
+    )
+    return entry
 
 
+def is_stale(entry):
+    age = (now_datetime() - get_datetime(entry["computed_at"])).total_seconds()
+    return age > get_fresh_seconds()
 
 
+def get_freshness(entry, source):
+    age = (now_datetime() - get_datetime(entry["computed_at"])).total_seconds()
+    return {
+        "computed_at": entry["computed_at"],
+        "age_seconds": int(age),
+        "is_stale": age > get_fresh_seconds(),
+        "source": source
+    }
 
 
-
-def get_incoming_leads(filters):
-    group_by = get_group_by(filters["interval"])
-
-    return frappe.db.sql(
-        f"""
-        SELECT
-            {group_by} AS label,
-            COUNT(name) AS value
-        FROM `tabLead`
-        WHERE creation BETWEEN %(from_date)s AND %(to_date)s
-        GROUP BY label
-        ORDER BY MIN(creation)
-        """,
-        filters,
-        as_dict=True,
+def enqueue_dashboard_refresh(filters):
+    frappe.enqueue(
+        "erpnext_crm_api.api.crm_dashboard.refresh_dashboard",
+        queue="short",
+        job_id=get_dashboard_cache_key(filters),
+        deduplicate=True,
+        filters=filters
     )
 
 
+def refresh_dashboard(filters):
+    compute_dashboard(filters)
 
 
+def precompute_dashboards():
+    """
+    Scheduler: warm the default dashboard (last quarter) for every
+    company and for all companies together.
+    """
+    companies = [None] + frappe.get_all("Company", pluck="name")
+
+    for company in companies:
+        for interval in PRECOMPUTE_INTERVALS:
+            filters = get_dashboard_filters(interval=interval, company=company)
+            entry = frappe.cache().get_value(get_dashboard_cache_key(filters))
+            if entry is None or is_stale(entry):
+                compute_dashboard(filters)
+
+
+# ---------------------------------------------------------
+# DASHBOARD ENGINE
+# Reads the CRM Daily Rollup (see crm_rollup.py): one grouped query
+# per source doctype, O(days in range) rather than O(rows). Every KPI
+# card and chart is assembled in Python from those grouped rows, and
+# all of them are bounded by date range, company and sales person.
+# ---------------------------------------------------------
+def get_sales_person_user(sales_person):
+    """
+    User behind a Sales Person (via its Employee); a User id is used as is.
+    """
+    if not sales_person:
+        return None
 
+    if frappe.db.exists("Sales Person", sales_person):
+        employee = frappe.db.get_value("Sales Person", sales_person, "employee")
+        user = employee and frappe.db.get_value("Employee", employee, "user_id")
+        # an unmapped sales person matches nothing rather than everything
+        return user or sales_person
 
-def get_opportunity_trends(filters):
-    group_by = get_group_by(filters["interval"])
+    return sales_person
 
-    return frappe.db.sql(
-        f"""
-        SELECT
-            {group_by} AS label,
-            COUNT(name) AS value
-        FROM `tabOpportunity`
-        WHERE creation BETWEEN %(from_date)s AND %(to_date)s
-        GROUP BY label
-        ORDER BY MIN(creation)
-        """,
-        filters,
-        as_dict=True,
-    )
 
+def build_dashboard(filters):
+    opportunity_rows = get_opportunity_groups(filters)
+    lead_rows = get_lead_groups(filters)
 
+    return {
+        "kpi_cards": get_kpi_cards(filters, opportunity_rows, lead_rows),
+        "charts": {
+            "incoming_leads": get_incoming_leads(lead_rows),
+            "opportunity_trends": get_opportunity_trends(opportunity_rows),
+            "won_opportunities": get_won_opportunities(opportunity_rows),
+            "territory_opportunity": get_territory_opportunity(opportunity_rows),
+            "campaign_opportunity": get_campaign_opportunity(opportunity_rows),
+            "territory_sales": get_territory_sales(opportunity_rows),
+            "lead_source": get_lead_source(lead_rows)
+        }
+    }
 
 
+def get_rollup_groups(reference_doctype, filters):
+    """
+    Rollup rows in the selected window grouped by (interval label,
+    month label, status, territory, campaign, source). Served by the
+    (reference_doctype, [company | owner_user,] rollup_date) indexes.
+    """
+    group_by = get_group_by(filters["interval"], "rollup_date")
 
+    conditions = [
+        "reference_doctype = %(reference_doctype)s",
+        "rollup_date BETWEEN %(from_date)s AND %(to_date)s"
+    ]
+    if filters.get("company"):
+        conditions.append("company = %(company)s")
+    if filters.get("owner_user"):
+        conditions.append("owner_user = %(owner_user)s")
 
-def get_won_opportunities(filters):
     return frappe.db.sql(
-        """
+        f"""
         SELECT
-            DATE_FORMAT(creation, '%%b %%Y') AS label,
-            COUNT(name) AS value
-        FROM `tabOpportunity`
-        WHERE status = 'Closed'
-          AND creation BETWEEN %(from_date)s AND %(to_date)s
-        GROUP BY YEAR(creation), MONTH(creation)
-        ORDER BY creation
+            {group_by} AS label,
+            DATE_FORMAT(rollup_date, '%%b %%Y') AS month_label,
+            status,
+            territory,
+            campaign,
+            source,
+            MIN(rollup_date) AS first_creation,
+            SUM(record_count) AS count,
+            SUM(opportunity_amount) AS amount
+        FROM `tabCRM Daily Rollup`
+        WHERE {" AND ".join(conditions)}
+        GROUP BY label, month_label, status, territory, campaign, source
+        HAVING SUM(record_count) != 0
         """,
-        filters,
+        {**filters, "reference_doctype": reference_doctype},
         as_dict=True,
     )
 
 
+def get_opportunity_groups(filters):
+    return get_rollup_groups("Opportunity", filters)
 
 
+def get_lead_groups(filters):
+    return get_rollup_groups("Lead", filters)
 
 
-def get_territory_opportunity(filters):
-    return frappe.db.sql(
-        """
-        SELECT territory AS label, COUNT(name) AS value
-        FROM `tabOpportunity`
-        WHERE territory IS NOT NULL
-        GROUP BY territory
-        """,
-        as_dict=True,
-    )
-
-
-
+def sum_rows(rows, key="count"):
+    return sum(row[key] or 0 for row in rows)
 
 
-def get_campaign_opportunity(filters):
-    return frappe.db.sql(
-        """
-        SELECT campaign AS label, COUNT(name) AS value
-        FROM `tabOpportunity`
-        WHERE campaign IS NOT NULL
-        GROUP BY campaign
-        """,
-        as_dict=True,
-    )
+def series(rows, label_key="label", value_key="count", order_by_first=True):
+    """
+    Fold grouped rows into [{label, value}], summing rows that share a label.
+    Ordered by earliest creation (time series) or first appearance.
+    """
+    totals = {}
+    first = {}
 
+    for row in rows:
+        label = row[label_key]
+        totals[label] = totals.get(label, 0) + (row[value_key] or 0)
+        if label not in first or row["first_creation"] < first[label]:
+            first[label] = row["first_creation"]
 
+    labels = list(totals)
+    if order_by_first:
+        labels.sort(key=lambda label: first[label])
 
+    return [{"label": label, "value": totals[label]} for label in labels]
 
 
+def get_kpi_cards(filters, opportunity_rows, lead_rows):
+    return {
+        "new_leads": sum_rows(lead_rows),
 
+        "new_opportunities": sum_rows(opportunity_rows),
 
+        "won_opportunities": sum_rows(row for row in opportunity_rows if row.status == "Closed"),
 
-def get_territory_sales(filters):
-    return frappe.db.sql(
-        """
-        SELECT territory AS label,
-               SUM(opportunity_amount) AS value
-        FROM `tabOpportunity`
-        WHERE status = 'Closed'
-        GROUP BY territory
-        """,
-        as_dict=True,
-    )
+        "open_opportunities": sum_rows(
+            row for row in opportunity_rows
+            if row.status not in ("Closed", "Lost")
+        ),
+    }
 
 
+def get_incoming_leads(lead_rows):
+    return series(lead_rows)
 
 
+def get_opportunity_trends(opportunity_rows):
+    return series(opportunity_rows)
 
 
+def get_won_opportunities(opportunity_rows):
+    return series(
+        [row for row in opportunity_rows if row.status == "Closed"],
+        label_key="month_label"
+    )
 
 
-def get_lead_source(filters):
-    return frappe.db.sql(
-        """
-        SELECT source AS label, COUNT(name) AS value
-        FROM `tabLead`
-        WHERE source IS NOT NULL
-        GROUP BY source
-        """,
-        as_dict=True,
+def get_territory_opportunity(opportunity_rows):
+    return series(
+        [row for row in opportunity_rows if row.territory is not None],
+        label_key="territory",
+        order_by_first=False
     )
 
 
+def get_campaign_opportunity(opportunity_rows):
+    return series(
+        [row for row in opportunity_rows if row.campaign is not None],
+        label_key="campaign",
+        order_by_first=False
+    )
 
 
+def get_territory_sales(opportunity_rows):
+    return series(
+        [row for row in opportunity_rows if row.status == "Closed"],
+        label_key="territory",
+        value_key="amount",
+        order_by_first=False
+    )
 
 
+def get_lead_source(lead_rows):
+    return series(
+        [row for row in lead_rows if row.source is not None],
+        label_key="source",
+        order_by_first=False
+    )
 
 
-def get_group_by(interval):
+def get_group_by(interval, column="creation"):
     if interval == "day":
-        return "DATE(creation)"
+        return f"DATE({column})"
     if interval == "week":
-        return "YEARWEEK(creation)"
-    return "DATE_FORMAT(creation, '%%b %%Y')"
+        return f"YEARWEEK({column})"
+    return f"DATE_FORMAT({column}, '%%b %%Y')"
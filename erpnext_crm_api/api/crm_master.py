@@ -27,8 +27,11 @@
 
 import frappe
 from frappe import _
+from erpnext_crm_api.api.utils import count_records
+from erpnext_crm_api.api.master_cache import cached_master_list
 
 @frappe.whitelist(allow_guest=True)
+@cached_master_list("CRM Master")
 def get_crm_master_list(
     search=None,
     sort_by="sorting_order",
@@ -74,13 +77,10 @@ def get_crm_master_list(
         # ---------------------------
         # Total Count (SAFE)
         # ---------------------------
-        total_count = len(
-            frappe.get_all(
-                "CRM Master",
-                filters=filters,
-                or_filters=or_filters,
-                pluck="name"
-            )
+        total_count, count_mode = count_records(
+            "CRM Master",
+            filters=filters,
+            or_filters=or_filters
         )
 
         # ---------------------------
@@ -106,6 +106,7 @@ def get_crm_master_list(
                 "page": page,
                 "page_size": page_size,
                 "total_records": total_count,
+                "count_mode": count_mode,
                 "total_pages": (total_count + page_size - 1) // page_size
             },
             "data": data
@@ -0,0 +1,284 @@
+import hashlib
+import frappe
+from frappe.utils import getdate, now_datetime, flt
+
+
+# ---------------------------------------------------------
+# CRM DAILY ROLLUP
+# date × company × territory × campaign × source × status × owner
+#   → record_count, opportunity_amount
+# Kept current by Lead / Opportunity doc_events (deltas) and
+# rebuilt nightly from the raw tables.
+# ---------------------------------------------------------
+ROLLUP_DOCTYPE = "CRM Daily Rollup"
+
+# doctype → columns holding the campaign / owner / amount on that doctype
+ROLLUP_SOURCES = {
+    "Lead": {"campaign": "campaign_name", "owner": "lead_owner", "amount": None},
+    "Opportunity": {"campaign": "campaign", "owner": "opportunity_owner", "amount": "opportunity_amount"},
+}
+
+DIMENSIONS = ["company", "territory", "campaign", "source", "status", "owner_user"]
+
+# rebuild_rollup fills a staging copy and swaps it in with RENAME TABLE
+ROLLUP_TABLE = f"tab{ROLLUP_DOCTYPE}"
+ROLLUP_STAGING_TABLE = f"{ROLLUP_TABLE}__rebuild"
+ROLLUP_OLD_TABLE = f"{ROLLUP_TABLE}__old"
+
+
+def get_rollup_key(reference_doctype, rollup_date, dims):
+    """
+    Row name for a rollup bucket. Must match the MD5(CONCAT_WS(...))
+    expression used by rebuild_rollup.
+    """
+    parts = [reference_doctype, str(rollup_date)] + [dims[d] or "" for d in DIMENSIONS]
+    return hashlib.md5("|".join(parts).encode()).hexdigest()
+
+
+def get_bucket(doc):
+    """
+    (key, reference_doctype, date, dims, amount) for a Lead / Opportunity doc.
+    """
+    spec = ROLLUP_SOURCES[doc.doctype]
+
+    dims = {
+        "company": doc.get("company") or None,
+        "territory": doc.get("territory") or None,
+        "campaign": doc.get(spec["campaign"]) or None,
+        "source": doc.get("source") or None,
+        "status": doc.get("status") or None,
+        "owner_user": doc.get(spec["owner"]) or None,
+    }
+    rollup_date = getdate(doc.creation)
+    amount = flt(doc.get(spec["amount"])) if spec["amount"] else 0
+
+    return (
+        get_rollup_key(doc.doctype, rollup_date, dims),
+        doc.doctype,
+        rollup_date,
+        dims,
+        amount
+    )
+
+
+def apply_delta(bucket, count, amount):
+    """
+    Atomically add count / amount to a bucket, creating the row if needed.
+    A bucket left without records is deleted.
+    """
+    key, reference_doctype, rollup_date, dims, _amount = bucket
+    now = now_datetime()
+
+    frappe.db.sql(
+        """
+        INSERT INTO `tabCRM Daily Rollup`
+            (name, rollup_key, reference_doctype, rollup_date,
+             company, territory, campaign, source, status, owner_user,
+             record_count, opportunity_amount,
+             creation, modified, modified_by, owner, docstatus, idx)
+        VALUES
+            (%(key)s, %(key)s, %(reference_doctype)s, %(rollup_date)s,
+             %(company)s, %(territory)s, %(campaign)s, %(source)s, %(status)s, %(owner_user)s,
+             %(count)s, %(amount)s,
+             %(now)s, %(now)s, 'Administrator', 'Administrator', 0, 0)
+        ON DUPLICATE KEY UPDATE
+            record_count = record_count + VALUES(record_count),
+            opportunity_amount = opportunity_amount + VALUES(opportunity_amount),
+            modified = VALUES(modified)
+        """,
+        {
+            "key": key,
+            "reference_doctype": reference_doctype,
+            "rollup_date": rollup_date,
+            "count": count,
+            "amount": amount,
+            "now": now,
+            **dims
+        }
+    )
+
+    if count < 0:
+        frappe.db.sql(
+            "DELETE FROM `tabCRM Daily Rollup` WHERE name = %(key)s AND record_count <= 0",
+            {"key": key}
+        )
+
+
+def update_rollup(doc, method=None):
+    """
+    doc_events hook (Lead / Opportunity on_update, on_trash).
+    Moves the document's contribution from its previous bucket to the
+    current one; nothing is written if neither bucket nor amount changed.
+    """
+    if doc.doctype not in ROLLUP_SOURCES:
+        return
+
+    current = get_bucket(doc)
+
+    if method == "on_trash":
+        apply_delta(current, -1, -current[4])
+        return
+
+    before = doc.get_doc_before_save()
+    previous = get_bucket(before) if before else None
+
+    if previous and previous[0] == current[0]:
+        if previous[4] != current[4]:
+            apply_delta(current, 0, current[4] - previous[4])
+        return
+
+    if previous:
+        apply_delta(previous, -1, -previous[4])
+
+    apply_delta(current, 1, current[4])
+
+
+def insert_rollup_rows(table, reference_doctype, now, dates=None):
+    """
+    INSERT ... SELECT the buckets of reference_doctype into `table`,
+    only those of the given creation `dates` when passed.
+    """
+    spec = ROLLUP_SOURCES[reference_doctype]
+    columns = {
+        "company": "NULLIF(company, '')",
+        "territory": "NULLIF(territory, '')",
+        "campaign": f"NULLIF(`{spec['campaign']}`, '')",
+        "source": "NULLIF(source, '')",
+        "status": "NULLIF(status, '')",
+        "owner_user": f"NULLIF(`{spec['owner']}`, '')",
+    }
+    amount = f"SUM(IFNULL(`{spec['amount']}`, 0))" if spec["amount"] else "0"
+    key = "MD5(CONCAT_WS('|', %(reference_doctype)s, DATE(creation), {0}))".format(
+        ", ".join(f"IFNULL({columns[d]}, '')" for d in DIMENSIONS)
+    )
+
+    values = {"reference_doctype": reference_doctype, "now": now}
+    where = ""
+    if dates:
+        where = "WHERE DATE(creation) IN %(dates)s"
+        values["dates"] = tuple(dates)
+
+    frappe.db.sql(
+        f"""
+        INSERT INTO `{table}`
+            (name, rollup_key, reference_doctype, rollup_date,
+             company, territory, campaign, source, status, owner_user,
+             record_count, opportunity_amount,
+             creation, modified, modified_by, owner, docstatus, idx)
+        SELECT
+            {key}, {key}, %(reference_doctype)s, DATE(creation),
+            {columns["company"]}, {columns["territory"]}, {columns["campaign"]},
+            {columns["source"]}, {columns["status"]}, {columns["owner_user"]},
+            COUNT(*), {amount},
+            %(now)s, %(now)s, 'Administrator', 'Administrator', 0, 0
+        FROM `tab{reference_doctype}`
+        {where}
+        GROUP BY DATE(creation), {", ".join(columns[d] for d in DIMENSIONS)}
+        """,
+        values
+    )
+
+
+def get_changed_dates(reference_doctype, since):
+    """
+    Rollup dates whose buckets may have changed after `since`: dates of
+    live buckets touched by deltas and creation dates of documents
+    modified or deleted since then (db_set changes write no delta and
+    a bucket emptied by a delta is gone from the live table). A
+    document never leaves its creation date, so recomputing whole dates
+    also covers the bucket it moved out of.
+    """
+    dates = set(frappe.db.sql_list(
+        f"""
+        SELECT DISTINCT rollup_date
+        FROM `{ROLLUP_TABLE}`
+        WHERE reference_doctype = %(reference_doctype)s AND modified >= %(since)s
+        """,
+        {"reference_doctype": reference_doctype, "since": since}
+    ))
+
+    creations = frappe.get_all(
+        reference_doctype, filters={"modified": [">=", since]}, pluck="creation"
+    )
+    for data in frappe.get_all(
+        "Deleted Document",
+        filters={"deleted_doctype": reference_doctype, "creation": [">=", since]},
+        pluck="data"
+    ):
+        creations.append(frappe.parse_json(data).get("creation"))
+
+    dates.update(getdate(creation) for creation in creations if creation)
+    return {str(d) for d in dates}
+
+
+def rebuild_rollup():
+    """
+    Recompute the whole rollup from tabLead / tabOpportunity
+    (nightly reconciliation; also catches db_set status changes).
+
+    Rows are built in a staging table, one committed INSERT ... SELECT
+    per source doctype, then swapped in with an atomic RENAME TABLE:
+    dashboards keep reading the previous rollup until the swap and the
+    live table is never locked by the scan. Before the swap, the dates
+    changed since the rebuild started are recomputed in the staging
+    table, so deltas written meanwhile are not lost.
+    """
+    frappe.db.sql_ddl(f"DROP TABLE IF EXISTS `{ROLLUP_STAGING_TABLE}`")
+    frappe.db.sql_ddl(f"CREATE TABLE `{ROLLUP_STAGING_TABLE}` LIKE `{ROLLUP_TABLE}`")
+
+    started = now_datetime()
+
+    for reference_doctype in ROLLUP_SOURCES:
+        insert_rollup_rows(ROLLUP_STAGING_TABLE, reference_doctype, started)
+        frappe.db.commit()
+
+    # catch up with changes made while the staging table was filled
+    now = now_datetime()
+    for reference_doctype in ROLLUP_SOURCES:
+        dates = get_changed_dates(reference_doctype, started)
+        if not dates:
+            continue
+
+        frappe.db.sql(
+            f"""
+            DELETE FROM `{ROLLUP_STAGING_TABLE}`
+            WHERE reference_doctype = %(reference_doctype)s AND rollup_date IN %(dates)s
+            """,
+            {"reference_doctype": reference_doctype, "dates": tuple(dates)}
+        )
+        insert_rollup_rows(ROLLUP_STAGING_TABLE, reference_doctype, now, dates=sorted(dates))
+        frappe.db.commit()
+
+    frappe.db.sql_ddl(f"DROP TABLE IF EXISTS `{ROLLUP_OLD_TABLE}`")
+    frappe.db.sql_ddl(
+        f"RENAME TABLE `{ROLLUP_TABLE}` TO `{ROLLUP_OLD_TABLE}`, "
+        f"`{ROLLUP_STAGING_TABLE}` TO `{ROLLUP_TABLE}`"
+    )
+    frappe.db.sql_ddl(f"DROP TABLE `{ROLLUP_OLD_TABLE}`")
+
+
+def ensure_rollup():
+    """
+    after_install / after_migrate: backfill in the background if the rollup is empty.
+    """
+    if not frappe.db.table_exists(ROLLUP_DOCTYPE):
+        return
+
+    if frappe.db.sql("SELECT name FROM `tabCRM Daily Rollup` LIMIT 1"):
+        return
+
+    if not frappe.db.sql("SELECT name FROM `tabLead` LIMIT 1") and \
+            not frappe.db.sql("SELECT name FROM `tabOpportunity` LIMIT 1"):
+        return
+
+    enqueue_rebuild()
+
+
+def enqueue_rebuild():
+    frappe.enqueue(
+        "erpnext_crm_api.api.crm_rollup.rebuild_rollup",
+        queue="long",
+        job_id="crm_api_rebuild_rollup",
+        deduplicate=True,
+        enqueue_after_commit=True
+    )
@@ -47,16 +47,23 @@
 
 
 
+import math
 import frappe
 from frappe import _
-from frappe.utils import nowdate,get_datetime, format_datetime
-from erpnext_crm_api.api.utils import api_response, api_error, get_paginated_data
+from frappe.utils import nowdate,get_datetime, format_datetime, cint, sbool
+from erpnext_crm_api.api.utils import (
+    api_response,
+    api_error,
+    encode_cursor,
+    decode_cursor
+)
 
 
 def handle_assignment_email(doc, method):
     """
     Stop default assignment email.
-    Send simple custom reminder style email instead.
+    Send simple custom reminder style email instead (in the background,
+    see enqueue_assignment_email).
     """
 
     # Only proceed if assignment is linked to a document
@@ -67,22 +74,70 @@ def handle_assignment_email(doc, method):
     if doc.reference_type != "Event":
         return
 
-    # Get Event document
-    event = frappe.get_doc("Event", doc.reference_name)
+    if not doc.allocated_to:
+        return
 
-    user_email = frappe.db.get_value("User", doc.allocated_to, "email")
+    event, user = doc.reference_name, doc.allocated_to
+    frappe.db.after_commit.add(lambda: enqueue_assignment_email(event, user))
 
-    if not user_email:
+
+# ---------------------------------------------------------
+# ASSIGNMENT EMAIL QUEUE
+# One email per user per event per coalescing window, sent by a
+# background job instead of in the ToDo insert request.
+# ---------------------------------------------------------
+ASSIGNMENT_EMAIL_KEY_PREFIX = "crm_api_assignment_email"
+DEFAULT_ASSIGNMENT_EMAIL_WINDOW = 600
+
+
+def get_assignment_email_window():
+    """
+    Coalescing window in seconds from site_config `crm_api_assignment_email_window`.
+    """
+    return cint(frappe.conf.get("crm_api_assignment_email_window") or DEFAULT_ASSIGNMENT_EMAIL_WINDOW)
+
+
+def get_assignment_email_key(event, user):
+    return f"{ASSIGNMENT_EMAIL_KEY_PREFIX}:{event}:{user}"
+
+
+def enqueue_assignment_email(event, user):
+    """
+    Queue the assignment email unless one for (event, user) was
+    already queued within the window. A coalesced assignment still
+    gets its default email removed.
+    """
+    key = get_assignment_email_key(event, user)
+
+    if not frappe.cache().set(
+        frappe.cache().make_key(key), 1, nx=True, ex=get_assignment_email_window()
+    ):
+        frappe.enqueue(
+            "erpnext_crm_api.api.custom_notification.delete_default_assignment_email",
+            queue="short",
+            job_id=f"{ASSIGNMENT_EMAIL_KEY_PREFIX}_cleanup:{event}",
+            deduplicate=True,
+            event=event
+        )
         return
 
+    frappe.enqueue(
+        "erpnext_crm_api.api.custom_notification.send_assignment_email",
+        queue="short",
+        job_id=key,
+        deduplicate=True,
+        event=event,
+        user=user
+    )
+
+
+def get_assignment_email_content(event):
     # Format event start time
     start_time = format_datetime(event.starts_on)
 
-    # ✅ Send custom simple email
-    frappe.sendmail(
-        recipients=[user_email],
-        subject=f"Reminder for Event: {event.subject}",
-        message=f"""
+    return (
+        f"Reminder for Event: {event.subject}",
+        f"""
 Hello,
 
 This is a reminder for the event: {event.subject}
@@ -90,13 +145,48 @@ This is a reminder for the event: {event.subject}
 Starts at: {start_time}
 
 Thank you.
-""",
-        delayed=False
+"""
     )
 
-    # ❌ Remove default queued email
+
+def send_assignment_email(event, user):
+    """
+    Background job: send the custom email and drop the default one.
+    On failure the coalescing key is cleared so a retry is not blocked
+    for the rest of the window.
+    """
+    try:
+        doc = frappe.db.get_value("Event", event, ["name", "subject", "starts_on"], as_dict=True)
+        if not doc:
+            return
+
+        user_email = frappe.db.get_value("User", user, "email")
+
+        if not user_email:
+            return
+
+        subject, message = get_assignment_email_content(doc)
+
+        # ✅ Send custom simple email
+        frappe.sendmail(
+            recipients=[user_email],
+            subject=subject,
+            message=message,
+            delayed=False
+        )
+    except Exception:
+        frappe.cache().delete_value(get_assignment_email_key(event, user))
+        raise
+
+    delete_default_assignment_email(doc.name)
+
+
+def delete_default_assignment_email(event):
+    """
+    ❌ Remove the default queued assignment email for event.
+    """
     frappe.db.delete("Email Queue", {
-        "reference_name": doc.reference_name,
+        "reference_name": event,
         "status": ("in", ["Not Sent", "Sending"])
     })
 
@@ -134,20 +224,12 @@ def send_event_assignment_email(todo=None):
     if not user_email:
         return {"status": "ignored", "reason": "User email not found"}
 
-    start_time = format_datetime(event.starts_on)
+    subject, message = get_assignment_email_content(event)
 
     frappe.sendmail(
         recipients=[user_email],
-        subject=f"Reminder for Event: {event.subject}",
-        message=f"""
-Hello,
-
-This is a reminder for the event: {event.subject}
-
-Starts at: {start_time}
-
-Thank you.
-""",
+        subject=subject,
+        message=message,
         delayed=False
     )
 
@@ -270,7 +352,9 @@ def get_event_assignments(
     page_size=20,
     sort_by="creation",
     sort_order="desc",
-    filter_type=None  # 'today' or 'upcoming'
+    filter_type=None,  # 'today' or 'upcoming'
+    cursor=None,
+    use_cursor=0
 ):
     """
     Paginated Event assignment list.
@@ -281,95 +365,156 @@ def get_event_assignments(
         - 'upcoming': fetch events starting after today
     """
     try:
-        today = nowdate()  # YYYY-MM-DD
-
-        # Step 1: build filters based on filter_type
-        event_filters = {}
-        if filter_type == "today":
-            # get events starting anytime today
-            event_filters["starts_on"] = ["between", [today + " 00:00:00", today + " 23:59:59"]]
-        elif filter_type == "upcoming":
-            # get events starting after today
-            event_filters["starts_on"] = [">", today + " 23:59:59"]
-
-        # Step 2: get event names
-        event_names = frappe.get_all(
-            "Event",
-            filters=event_filters,
-            pluck="name"
+        page = int(page)
+        page_size = int(page_size)
+        use_cursor = bool(cursor) or sbool(use_cursor)
+
+        if sort_by not in ASSIGNMENT_SORT_FIELDS:
+            sort_by = "creation"
+        sort_order = "desc" if sort_order.lower() == "desc" else "asc"
+
+        join_condition, where, values = get_assignment_conditions(filter_type, search)
+
+        # Step 1: one COUNT(*) over the same join
+        total_count = frappe.db.sql(
+            f"""
+            SELECT COUNT(*)
+            FROM `tabToDo` t
+            INNER JOIN `tabEvent` e ON {join_condition}
+            WHERE {" AND ".join(where)}
+            """,
+            values
+        )[0][0]
+
+        # Step 2: one page of ToDo ⋈ Event
+        sort_column = ASSIGNMENT_SORT_FIELDS[sort_by]
+        next_cursor = None
+
+        if use_cursor:
+            if cursor:
+                cursor_value, cursor_name = decode_cursor(cursor, sort_by, sort_order)
+                op = "<" if sort_order == "desc" else ">"
+                where = where + [
+                    f"({sort_column} {op} %(cursor_value)s"
+                    f" OR ({sort_column} = %(cursor_value)s AND t.name {op} %(cursor_name)s))"
+                ]
+                values.update({"cursor_value": cursor_value, "cursor_name": cursor_name})
+
+            limit, start = page_size + 1, 0
+        else:
+            limit, start = page_size, (page - 1) * page_size
+
+        rows = frappe.db.sql(
+            f"""
+            SELECT
+                t.name,
+                t.reference_name,
+                t.allocated_to,
+                t.status,
+                {sort_column} AS sort_value,
+                e.subject AS event_subject,
+                e.starts_on
+            FROM `tabToDo` t
+            INNER JOIN `tabEvent` e ON {join_condition}
+            WHERE {" AND ".join(where)}
+            ORDER BY {sort_column} {sort_order}, t.name {sort_order}
+            LIMIT %(limit)s OFFSET %(start)s
+            """,
+            {**values, "limit": limit, "start": start},
+            as_dict=True
         )
 
-        if not event_names:
-            return api_response(
-                data={
-                    "page": int(page),
-                    "page_size": int(page_size),
-                    "total_records": 0,
-                    "total_pages": 0,
-                    "data": []
-                },
-                message=_("No events found")
-            )
-
-        # Step 3: get ToDo only for those events
-        result = get_paginated_data(
-            doctype="ToDo",
-            fields=[
-                "name",
-                "reference_name",
-                "allocated_to",
-                "status",
-                "creation"
-            ],
-            filters={
-                "reference_type": "Event",
-                "reference_name": ["in", event_names]
-            },
-            search=search,
-            search_fields=["reference_name", "allocated_to"],
-            sort_by=sort_by,
-            sort_order=sort_order,
-            page=page,
-            page_size=page_size
-        )
-
-        data = []
-
-        for row in result["results"]:
-            event = frappe.db.get_value(
-                "Event",
-                row["reference_name"],
-                ["subject", "starts_on"],
-                as_dict=True
-            )
-
-            data.append({
-                "todo": row["name"],
-                "event": row["reference_name"],
-                "event_subject": event.subject if event else None,
-                "starts_on": format_datetime(event.starts_on) if event else None,
-                "assigned_to": row["allocated_to"],
-                "status": row["status"]
-            })
+        if use_cursor:
+            if len(rows) > page_size and page_size:
+                rows = rows[:page_size]
+                next_cursor = encode_cursor(
+                    sort_by, sort_order, {sort_by: rows[-1].sort_value, "name": rows[-1].name}
+                )
+            else:
+                rows = rows[:page_size]
+
+        data = [
+            {
+                "todo": row.name,
+                "event": row.reference_name,
+                "event_subject": row.event_subject,
+                "starts_on": format_datetime(row.starts_on),
+                "assigned_to": row.allocated_to,
+                "status": row.status
+            }
+            for row in rows
+        ]
 
         return api_response(
             data={
-                "page": int(page),
-                "page_size": int(page_size),
-                "total_records": result["count"],
-                "total_pages": result["total_pages"],
+                "page": page,
+                "page_size": page_size,
+                "total_records": total_count,
+                "count_mode": "exact",
+                "total_pages": math.ceil(total_count / page_size) if page_size else 1,
+                "next_cursor": next_cursor,
                 "data": data
             },
-            message=_("Event Assignment List Fetched Successfully")
+            message=_("Event Assignment List Fetched Successfully"),
+            etag=True
         )
 
     except PermissionError:
         return api_error("Not permitted", 403)
 
+    except frappe.ValidationError as e:
+        return api_error(str(e), 400)
+
     except Exception as e:
         return api_error(str(e), 500)
 
 
+# sort_by → column of the ToDo ⋈ Event join
+# Nullable columns are wrapped in IFNULL so the cursor seek (which
+# compares with = / < / >) neither skips nor repeats NULL rows.
+ASSIGNMENT_SORT_FIELDS = {
+    "creation": "t.creation",
+    "modified": "t.modified",
+    "name": "t.name",
+    "status": "IFNULL(t.status, '')",
+    "allocated_to": "IFNULL(t.allocated_to, '')",
+    "reference_name": "t.reference_name",
+    "starts_on": "e.starts_on",
+}
+
+
+def get_assignment_conditions(filter_type=None, search=None):
+    """
+    (join condition, where conditions, values) for Event assignments.
+    The starts_on window is part of the join, so only ToDos of events
+    in the window are read (via the ToDo reference index).
+
+    filter_type:
+        - None: all events
+        - 'today': events starting today
+        - 'upcoming': events starting after today
+    """
+    today = nowdate()  # YYYY-MM-DD
+
+    join_condition = "e.name = t.reference_name"
+    values = {}
+
+    if filter_type == "today":
+        join_condition += " AND e.starts_on BETWEEN %(day_start)s AND %(day_end)s"
+        values.update({"day_start": today + " 00:00:00", "day_end": today + " 23:59:59"})
+    elif filter_type == "upcoming":
+        join_condition += " AND e.starts_on > %(day_end)s"
+        values["day_end"] = today + " 23:59:59"
+
+    where = ["t.reference_type = 'Event'"]
+
+    if search and search.strip():
+        where.append("(t.reference_name LIKE %(search)s OR t.allocated_to LIKE %(search)s)")
+        values["search"] = f"%{search.strip()}%"
+
+    return join_condition, where, values
+
+
 
 
 
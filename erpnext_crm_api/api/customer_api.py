@@ -1,5 +1,6 @@
 import frappe
-from erpnext_crm_api.api.utils import api_response, api_error
+from erpnext_crm_api.api.utils import api_response, api_error, count_records, get_all_where
+from erpnext_crm_api.api.search import get_search_filters
 from frappe.utils import cint
 from frappe import _
 
@@ -23,21 +24,23 @@ def list_customers(
     filters.pop("cmd", None)
 
     # -----------------------------
-    # ERPNext default OR search
+    # Search (FULLTEXT index, LIKE fallback)
     # -----------------------------
     or_filters = []
+    conditions = []
     if search:
-        or_filters = [
-            ["Customer", "customer_name", "like", f"%{search}%"],
-            ["Customer", "mobile_no", "like", f"%{search}%"],
-            ["Customer", "email_id", "like", f"%{search}%"],
-        ]
+        or_filters, conditions = get_search_filters(
+            "Customer",
+            search.strip(),
+            ["customer_name", "mobile_no", "email_id"]
+        )
 
     # -----------------------------
     # Fetch paginated data
     # -----------------------------
-    customers = frappe.get_list(
+    customers = get_all_where(
         "Customer",
+        conditions,
         fields=[
             "name",
             "customer_name",
@@ -56,14 +59,12 @@ def list_customers(
     # -----------------------------
     # ERPNext way to get total count
     # -----------------------------
-    total_count = len(
-        frappe.get_all(
-            "Customer",
-            filters=filters,
-            or_filters=or_filters,
-            limit_page_length=0,
-            ignore_permissions=False
-        )
+    total_count, count_mode = count_records(
+        "Customer",
+        filters=filters,
+        or_filters=or_filters,
+        conditions=conditions,
+        ignore_permissions=False
     )
 
     # return {
@@ -83,10 +84,12 @@ def list_customers(
             "page": page,
             "page_size": page_size,
             "total_records": total_count,
+            "count_mode": count_mode,
             "total_pages": (total_count + page_size - 1) // page_size,
             "data": customers
         },
         message=_("Customer List Fetched Successfully"),
         status_code=200,
+        etag=True,
         flatten=True
     )
\ No newline at end of file
@@ -1,10 +1,12 @@
 import frappe
 from frappe import _
-from erpnext_crm_api.api.utils import api_response, api_error
+from erpnext_crm_api.api.utils import api_response, api_error, count_records
+from erpnext_crm_api.api.master_cache import cached_master_list
 
 
 
 @frappe.whitelist(allow_guest=True)
+@cached_master_list("Customer Group")
 def get_customer_groups(
     search=None,
     sort_by="name",
@@ -50,13 +52,10 @@ def get_customer_groups(
         # ---------------------------
         # Total Count
         # ---------------------------
-        total_count = len(
-            frappe.get_all(
-                "Customer Group",
-                filters=filters,
-                or_filters=or_filters,
-                pluck="name"
-            )
+        total_count, count_mode = count_records(
+            "Customer Group",
+            filters=filters,
+            or_filters=or_filters
         )
 
         # ---------------------------
@@ -94,6 +93,7 @@ def get_customer_groups(
                 "page": page,
                 "page_size": page_size,
                 "total_records": total_count,
+                "count_mode": count_mode,
                 "total_pages": (total_count + page_size - 1) // page_size
             })
 
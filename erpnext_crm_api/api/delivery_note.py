@@ -1,5 +1,6 @@
 import frappe
 from frappe.utils import nowdate, nowtime
+from erpnext_crm_api.api.utils import get_paginated_data, with_etag, get_doc_etag, not_modified_response
 
 @frappe.whitelist(methods=["POST"])
 def create_delivery_note(data=None):
@@ -162,11 +163,12 @@ def list_delivery_notes(
     search=None,
     status=None,
     customer=None,
-    company=None
+    company=None,
+    cursor=None,
+    use_cursor=0
 ):
     page = int(page)
     page_size = int(page_size)
-    start = (page - 1) * page_size
 
     # -------------------------
     # AND FILTERS
@@ -182,66 +184,51 @@ def list_delivery_notes(
     if company:
         filters["company"] = company
 
-    # -------------------------
-    # OR FILTERS (SEARCH)
-    # -------------------------
-    or_filters = []
-
-    if search:
-        or_filters = [
-            ["Delivery Note", "name", "like", f"%{search}%"],
-            ["Delivery Note", "customer", "like", f"%{search}%"],
-            ["Delivery Note", "company", "like", f"%{search}%"],
-            ["Delivery Note", "status", "like", f"%{search}%"],
-        ]
-
     # -------------------------
     # DATA QUERY
     # -------------------------
-    data = frappe.get_all(
-        "Delivery Note",
-        fields=[
-            "name",
-            "posting_date",
-            "customer",
-            "company",
-            "status",
-            "grand_total",
-            "currency",
-            "docstatus",
-            "modified"
-        ],
-        filters=filters,
-        or_filters=or_filters,
-        order_by=f"{sort_by} {sort_order}",
-        limit_start=start,
-        limit_page_length=page_size
-    )
-
-    # -------------------------
-    # TOTAL COUNT (OR-safe)
-    # -------------------------
-    total = len(
-        frappe.get_all(
-            "Delivery Note",
+    try:
+        result = get_paginated_data(
+            doctype="Delivery Note",
+            fields=[
+                "name",
+                "posting_date",
+                "customer",
+                "company",
+                "status",
+                "grand_total",
+                "currency",
+                "docstatus",
+                "modified"
+            ],
             filters=filters,
-            or_filters=or_filters,
-            pluck="name"
+            search=search,
+            search_fields=["name", "customer", "company", "status"],
+            sort_by=sort_by,
+            sort_order=sort_order,
+            page=page,
+            page_size=page_size,
+            cursor=cursor,
+            use_cursor=use_cursor
         )
-    )
+    except frappe.ValidationError as e:
+        return {"status": "error", "message": str(e)}
 
-    total_pages = (total + page_size - 1) // page_size
+    total = result["count"]
+    total_pages = result["total_pages"]
 
-    return {
+    return with_etag({
         "status": "success",
         "page": page,
         "page_size": page_size,
         "total": total,
+        "count_mode": result["count_mode"],
         "total_pages": total_pages,
-        "next_page": page + 1 if page < total_pages else None,
+        "next_page": page + 1 if total_pages and page < total_pages else None,
         "prev_page": page - 1 if page > 1 else None,
-        "data": data
-    }
+        "next_cursor": result["next_cursor"],
+        "data": result["results"]
+    })
 
 
 
@@ -482,9 +469,15 @@ def get_delivery_note_by_id(name):
                 "message": "Delivery Note name is required"
             }
 
+        # Client already has this version → 304
+        etag = get_doc_etag("Delivery Note", name)
+        not_modified = not_modified_response(etag)
+        if not_modified:
+            return not_modified
+
         dn = frappe.get_doc("Delivery Note", name)
 
-        return {
+        return with_etag({
             "status": "success",
             "message":"Delivery Note Fetched Successfully",
             "data": {
@@ -595,7 +588,7 @@ def get_delivery_note_by_id(name):
                 "owner": dn.owner,
                 "modified": dn.modified
             }
-        }
+        }, etag)
 
     except frappe.DoesNotExistError:
         return {
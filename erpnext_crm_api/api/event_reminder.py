@@ -1,142 +1,621 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
 import frappe
-from frappe.utils import now_datetime, add_to_date, format_datetime
+from frappe import _
+from frappe.utils import now_datetime, add_to_date, format_datetime, cint
+from erpnext_crm_api.api.utils import api_response, api_error, incr_counter, get_counters
+
+
+# Minutes before starts_on when no Employee setting exists for the owner
+DEFAULT_REMINDER_MINUTES = 60
+
+# Due reminders older than this are not picked up (only after scheduler downtime)
+REMINDER_CATCH_UP_MINUTES = 1440
+
+# Cached {user_id: minutes} of every Employee with a reminder setting
+REMINDER_MINUTES_CACHE_KEY = "crm_api_event_reminder_minutes"
 
 
 def send_configurable_event_reminders():
+    """
+    Scheduler tick: runs only while holding the reminder lease, so ticks
+    on several scheduler workers never overlap; a busy tick is skipped.
+    """
+    with reminder_lease() as acquired:
+        if not acquired:
+            incr_counter(REMINDER_LOCK_STATS_KEY, "skipped")
+            get_logger().info("Reminder tick skipped: previous run still holds the lease")
+            return
+
+        incr_counter(REMINDER_LOCK_STATS_KEY, "acquired")
+        run_event_reminders()
+
+
+def run_event_reminders():
+    """
+    Only events whose precomputed custom_reminder_at is due are read,
+    via the (custom_reminder_sent, custom_reminder_at) index.
+    Counters and phase timings of each run go to the run history.
+    """
+    logger = get_logger()
+    run = start_run()
     now = now_datetime()
-    print(f"\n=== REMINDER JOB STARTED at {now} ===")
-
-    events = frappe.get_all(
-        "Event",
-        filters={
-            "status": "Open",
-            "send_reminder": 1,
-            "custom_reminder_sent": 0
-        },
-        fields=["name", "subject", "starts_on", "owner", "all_day"]
-    )
 
-    if not events:
-        print("No eligible events found.")
+    try:
+        # rows stay locked until this job commits; an overlapping tick
+        # skips them and, after the commit, no longer matches them
+        with timed(run, "fetch_events"):
+            events = frappe.db.sql(
+                """
+                SELECT name, subject, starts_on, owner, all_day
+                FROM `tabEvent`
+                WHERE custom_reminder_sent = 0
+                  AND custom_reminder_at BETWEEN %(catch_up)s AND %(now)s
+                  AND starts_on > %(now)s
+                  AND status = 'Open'
+                  AND send_reminder = 1
+                ORDER BY custom_reminder_at ASC
+                FOR UPDATE SKIP LOCKED
+                """,
+                {"catch_up": add_to_date(now, minutes=-REMINDER_CATCH_UP_MINUTES), "now": now},
+                as_dict=True
+            )
+        run["counters"]["events_due"] = len(events)
+
+        if not events:
+            return
+
+        with timed(run, "fetch_participants"):
+            participants_by_event = {}
+            for p in frappe.get_all(
+                "Event Participants",
+                filters={"parent": ["in", [event.name for event in events]]},
+                fields=["parent", "email", "reference_doctype", "reference_docname"]
+            ):
+                participants_by_event.setdefault(p.parent, []).append(p)
+
+        run["counters"]["participants"] = sum(len(rows) for rows in participants_by_event.values())
+
+        # one lookup per reference doctype for every due event of this tick
+        with timed(run, "resolve_emails"):
+            resolved = resolve_participant_emails(
+                p for rows in participants_by_event.values() for p in rows if not p.email
+            )
+
+        run["counters"]["emails_resolved"] = len([email for email in resolved.values() if email])
+
+        with timed(run, "render"):
+            reminders = []
+            for event in events:
+                emails = [
+                    p.email or resolved.get((p.reference_doctype, p.reference_docname))
+                    for p in participants_by_event.get(event.name, [])
+                ]
+
+                # Remove duplicates & empty
+                emails = list(set(filter(None, emails)))
+
+                logger.debug(f"Event {event.name}: recipients {emails}")
+
+                if not emails:
+                    run["counters"]["events_skipped"] += 1
+                    continue
+
+                reminder = build_reminder_email(event, emails)
+                if not reminder.get("recipients"):
+                    # every recipient unsubscribed
+                    run["counters"]["events_skipped"] += 1
+                    continue
+
+                reminders.append(reminder)
+
+        if not reminders:
+            return
+
+        # Email Queue rows and sent flags go in with the same commit
+        with timed(run, "queue"):
+            queue_reminder_emails(reminders)
+            mark_reminders_sent([reminder["reference_name"] for reminder in reminders])
+
+        run["counters"]["mails_queued"] = len(reminders)
+        run["counters"]["recipients"] = sum(len(reminder["recipients"]) for reminder in reminders)
+
+    except Exception:
+        run["status"] = "Failed"
+        run["error"] = frappe.get_traceback()
+        raise
+
+    finally:
+        finish_run(run, logger)
+
+
+# ---------------------------------------------------------
+# LEASE LOCK (REDIS SET NX PX)
+# The holder's token is stored with a short expiry that a heartbeat
+# thread keeps extending; a crashed worker's lease simply expires.
+# Extend / release only act while the key still holds our token.
+# ---------------------------------------------------------
+REMINDER_LOCK_KEY = "crm_api_event_reminder_lock"
+REMINDER_LOCK_STATS_KEY = "crm_api_event_reminder_lock_stats"
+DEFAULT_LEASE_SECONDS = 120
+
+EXTEND_LEASE_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("PEXPIRE", KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+RELEASE_LEASE_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+
+def get_lease_seconds():
+    """
+    Lease length from site_config `crm_api_reminder_lease_seconds`.
+    """
+    return cint(frappe.conf.get("crm_api_reminder_lease_seconds") or DEFAULT_LEASE_SECONDS)
+
+
+@contextmanager
+def reminder_lease():
+    """
+    Yields True if the lease was acquired (and holds it until exit),
+    False if another run holds it.
+    """
+    cache = frappe.cache()
+    key = cache.make_key(REMINDER_LOCK_KEY)
+    # built here: make_key reads frappe.conf, which is unbound in the heartbeat thread
+    stats_key = cache.make_key(REMINDER_LOCK_STATS_KEY)
+    token = frappe.generate_hash(length=20)
+    lease_ms = get_lease_seconds() * 1000
+
+    if not cache.set(key, token, nx=True, px=lease_ms):
+        yield False
         return
 
-    for event in events:
-        print(f"\n>> Checking Event: {event.name}")
+    stop = threading.Event()
 
-        # Get employee reminder minutes (default 15 if not set)
-        employee_info = frappe.db.get_value(
-            "Employee",
-            {"user_id": event.owner},
-            ["custom_event_reminder"],
-            as_dict=True
-        )
+    def heartbeat():
+        while not stop.wait(lease_ms / 3000):
+            try:
+                extended = cache.eval(EXTEND_LEASE_SCRIPT, 1, key, token, lease_ms)
+            except Exception:
+                continue
 
-        reminder_mins = 60
-        if employee_info and employee_info.custom_event_reminder:
-            reminder_mins = int(employee_info.custom_event_reminder)
+            if not extended:
+                try:
+                    cache.hincrby(stats_key, "lease_lost", 1)
+                except Exception:
+                    pass
+                return
 
-        trigger_time = add_to_date(event.starts_on, minutes=-reminder_mins)
+    thread = threading.Thread(target=heartbeat, daemon=True)
+    thread.start()
 
-        print("------ TIME DEBUG ------")
-        print("NOW:", now)
-        print("EVENT START:", event.starts_on)
-        print("REMINDER MINS:", reminder_mins)
-        print("TRIGGER TIME:", trigger_time)
-        print("CONDITION:", trigger_time <= now < event.starts_on)
-        print("------------------------")
+    try:
+        yield True
+    finally:
+        stop.set()
+        thread.join()
+        cache.eval(RELEASE_LEASE_SCRIPT, 1, key, token)
 
-        # Only send during correct time window
-        if not (trigger_time <= now < event.starts_on):
-            print("Not in trigger window.")
-            continue
 
-        print("Trigger window matched. Collecting participants...")
+# ---------------------------------------------------------
+# RUN INSTRUMENTATION
+# One summary line per run at INFO (per event details at DEBUG, see
+# site_config `crm_api_reminder_log_level`); the last runs are kept
+# in a capped redis list for get_reminder_job_stats.
+# ---------------------------------------------------------
+REMINDER_RUNS_KEY = "crm_api_event_reminder_runs"
+REMINDER_RUNS_LIMIT = 100
 
-        participants = frappe.get_all(
-            "Event Participants",
-            filters={"parent": event.name},
-            fields=["email", "reference_doctype", "reference_docname"]
-        )
+RUN_COUNTERS = [
+    "events_due",
+    "participants",
+    "emails_resolved",
+    "events_skipped",
+    "mails_queued",
+    "recipients"
+]
 
-        emails = []
-
-        for p in participants:
-            p_email = p.email
-
-            if not p_email:
-
-                if p.reference_doctype == "User":
-                    p_email = frappe.db.get_value("User", p.reference_docname, "email")
-
-                elif p.reference_doctype == "Lead":
-                    p_email = frappe.db.get_value("Lead", p.reference_docname, "email_id")
-
-                elif p.reference_doctype == "Prospect":
-                    contact_name = frappe.db.get_value(
-                        "Dynamic Link",
-                        {
-                            "link_doctype": "Prospect",
-                            "link_name": p.reference_docname,
-                            "parenttype": "Contact"
-                        },
-                        "parent"
-                    )
-                    if contact_name:
-                        p_email = frappe.db.get_value("Contact", contact_name, "email_id")
-
-                elif p.reference_doctype == "Employee":
-                    emp = frappe.get_doc("Employee", p.reference_docname)
-                    p_email = (
-                        emp.prefered_email
-                        or emp.company_email
-                        or emp.personal_email
-                        or emp.user_id
-                    )
-
-            if p_email:
-                emails.append(p_email)
-
-        # Remove duplicates & empty
-        emails = list(set(filter(None, emails)))
-
-        print("Final Email List:", emails)
-
-        if not emails:
-            print("No valid emails found. Skipping.")
-            continue
-
-        # Send reminder
-        send_bulk_reminder(event, emails)
-
-        # Mark reminder as sent
-        frappe.db.set_value(
-            "Event",
-            event.name,
-            "custom_reminder_sent",
-            1,
-            update_modified=False
-        )
 
-        print(f"Reminder successfully sent for {event.name}")
+def get_logger():
+    logger = frappe.logger("erpnext_crm_api.event_reminder")
+    level = frappe.conf.get("crm_api_reminder_log_level")
+    if level:
+        logger.setLevel(str(level).upper())
+    return logger
+
+
+def start_run():
+    return {
+        "started_at": str(now_datetime()),
+        "status": "Success",
+        "counters": {counter: 0 for counter in RUN_COUNTERS},
+        "timings_ms": {},
+        "_start": time.monotonic()
+    }
+
+
+@contextmanager
+def timed(run, phase):
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        run["timings_ms"][phase] = round((time.monotonic() - start) * 1000, 2)
+
+
+def finish_run(run, logger):
+    """
+    Log the run summary and push it to the bounded history (best effort).
+    """
+    run["timings_ms"]["total"] = round((time.monotonic() - run.pop("_start")) * 1000, 2)
+
+    if run["status"] == "Failed":
+        logger.error(frappe.as_json(run, indent=None))
+    else:
+        logger.info(frappe.as_json(run, indent=None))
+
+    try:
+        frappe.cache().lpush(REMINDER_RUNS_KEY, frappe.as_json(run, indent=None))
+        frappe.cache().ltrim(REMINDER_RUNS_KEY, 0, REMINDER_RUNS_LIMIT - 1)
+    except Exception:
+        pass
+
 
+def get_run_history(limit=REMINDER_RUNS_LIMIT):
+    """
+    Latest runs first.
+    """
+    rows = frappe.cache().lrange(REMINDER_RUNS_KEY, 0, limit - 1) or []
+    return [json.loads(frappe.safe_decode(row)) for row in rows]
 
-def send_bulk_reminder(event, recipients):
+
+@frappe.whitelist()
+def get_reminder_job_stats(limit=20):
+    """
+    API: Counters and phase timings of the latest reminder runs (System Manager only)
+    """
+    if "System Manager" not in frappe.get_roles():
+        return api_error("Not permitted", 403)
+
+    limit = min(max(cint(limit) or 20, 1), REMINDER_RUNS_LIMIT)
+    runs = get_run_history(limit)
+
+    totals = {counter: 0 for counter in RUN_COUNTERS}
+    for run in runs:
+        for counter, value in run["counters"].items():
+            totals[counter] = totals.get(counter, 0) + value
+
+    durations = [run["timings_ms"].get("total", 0) for run in runs]
+    lock = get_counters(REMINDER_LOCK_STATS_KEY)
+
+    return api_response(
+        data={
+            "runs": runs,
+            "summary": {
+                "runs": len(runs),
+                "failed": len([run for run in runs if run["status"] == "Failed"]),
+                "totals": totals,
+                "avg_ms": round(sum(durations) / len(durations), 2) if durations else 0,
+                "max_ms": max(durations) if durations else 0
+            },
+            "lock": {
+                "held": bool(frappe.cache().execute_command("EXISTS", frappe.cache().make_key(REMINDER_LOCK_KEY))),
+                "lease_seconds": get_lease_seconds(),
+                "acquired": lock.get("acquired", 0),
+                "skipped": lock.get("skipped", 0),
+                "lease_lost": lock.get("lease_lost", 0)
+            }
+        },
+        message=_("Reminder Job Stats Fetched Successfully"),
+        flatten=True
+    )
+
+
+# ---------------------------------------------------------
+# PARTICIPANT EMAIL RESOLUTION
+# (reference_doctype, reference_docname) → email, one query per doctype
+# ---------------------------------------------------------
+def resolve_participant_emails(participants):
+    """
+    Emails of participants without an email of their own.
+    Doctypes other than User / Lead / Prospect / Employee are ignored.
+    """
+    names = {}
+    for p in participants:
+        if p.reference_doctype and p.reference_docname:
+            names.setdefault(p.reference_doctype, set()).add(p.reference_docname)
+
+    resolved = {}
+
+    if names.get("User"):
+        for row in frappe.get_all(
+            "User",
+            filters={"name": ["in", list(names["User"])]},
+            fields=["name", "email"]
+        ):
+            resolved[("User", row.name)] = row.email
+
+    if names.get("Lead"):
+        for row in frappe.get_all(
+            "Lead",
+            filters={"name": ["in", list(names["Lead"])]},
+            fields=["name", "email_id"]
+        ):
+            resolved[("Lead", row.name)] = row.email_id
+
+    if names.get("Prospect"):
+        # first linked contact (by link order) that has an email
+        for row in frappe.db.sql(
+            """
+            SELECT dl.link_name, c.email_id
+            FROM `tabDynamic Link` dl
+            INNER JOIN `tabContact` c ON c.name = dl.parent
+            WHERE dl.parenttype = 'Contact'
+              AND dl.link_doctype = 'Prospect'
+              AND dl.link_name IN %(names)s
+              AND IFNULL(c.email_id, '') != ''
+            ORDER BY dl.creation, dl.idx
+            """,
+            {"names": tuple(names["Prospect"])},
+            as_dict=True
+        ):
+            resolved.setdefault(("Prospect", row.link_name), row.email_id)
+
+    if names.get("Employee"):
+        for row in frappe.get_all(
+            "Employee",
+            filters={"name": ["in", list(names["Employee"])]},
+            fields=["name", "prefered_email", "company_email", "personal_email", "user_id"]
+        ):
+            resolved[("Employee", row.name)] = (
+                row.prefered_email
+                or row.company_email
+                or row.personal_email
+                or row.user_id
+            )
+
+    return resolved
+
+
+# ---------------------------------------------------------
+# BATCHED DISPATCH
+# All reminders of a tick are rendered first, then written as Email
+# Queue / Email Queue Recipient rows with one bulk insert each; the
+# regular email queue job sends them.
+# ---------------------------------------------------------
+def get_reminder_content(event):
     time_str = "All Day" if event.all_day else format_datetime(event.starts_on, "hh:mm a")
 
-    frappe.sendmail(
-        recipients=recipients,
-        subject=f"Reminder: {event.subject}",
-        message=f"""
+    return (
+        f"Reminder: {event.subject}",
+        f"""
         <p>This is a reminder for the event:</p>
         <p><b>{event.subject}</b></p>
         <p>Starts at: {time_str}</p>
-        """,
+        """
+    )
+
+
+def build_reminder_email(event, recipients):
+    """
+    Email Queue values of one reminder, rendered the way frappe.sendmail
+    would (sender account, MIME message, unsubscribed recipients dropped).
+    """
+    from frappe.email.doctype.email_queue.email_queue import QueueBuilder
+
+    subject, message = get_reminder_content(event)
+
+    return QueueBuilder(
+        recipients=recipients,
+        subject=subject,
+        message=message,
         reference_doctype="Event",
         reference_name=event.name
+    ).as_dict()
+
+
+def queue_reminder_emails(reminders):
+    """
+    Bulk insert rendered reminders into the email queue.
+    """
+    now = now_datetime()
+    user = frappe.session.user
+
+    queue_fields = None
+    queue_rows = []
+    recipient_rows = []
+
+    for reminder in reminders:
+        values = {
+            k: frappe.as_json(v) if isinstance(v, (dict, list)) else v
+            for k, v in reminder.items()
+            if k != "recipients"
+        }
+        if queue_fields is None:
+            queue_fields = list(values)
+
+        name = frappe.generate_hash(length=10)
+        queue_rows.append(
+            [name, "Not Sent", now, now, user, user, 0]
+            + [values.get(field) for field in queue_fields]
+        )
+
+        for idx, recipient in enumerate(reminder["recipients"], start=1):
+            recipient_rows.append([
+                frappe.generate_hash(length=10), name, "Email Queue", "recipients", idx,
+                recipient, "Not Sent", now, now, user, user, 0
+            ])
+
+    frappe.db.bulk_insert(
+        "Email Queue",
+        ["name", "status", "creation", "modified", "owner", "modified_by", "docstatus"] + queue_fields,
+        queue_rows
+    )
+    frappe.db.bulk_insert(
+        "Email Queue Recipient",
+        [
+            "name", "parent", "parenttype", "parentfield", "idx",
+            "recipient", "status", "creation", "modified", "owner", "modified_by", "docstatus"
+        ],
+        recipient_rows
+    )
+
+
+def mark_reminders_sent(event_names):
+    """
+    Flip custom_reminder_sent for all queued events in one UPDATE.
+    """
+    if not event_names:
+        return
+
+    frappe.db.sql(
+        """
+        UPDATE `tabEvent`
+        SET custom_reminder_sent = 1
+        WHERE name IN %(names)s AND custom_reminder_sent = 0
+        """,
+        {"names": tuple(event_names)}
     )
 
 
 def handle_event_reschedule(doc, method):
     if doc.has_value_changed("starts_on"):
-        print(f"[HOOK] Event {doc.name} rescheduled.")
+        get_logger().debug(f"Event {doc.name} rescheduled, reminder re-armed")
         doc.db_set("custom_reminder_sent", 0)
+
+
+# ---------------------------------------------------------
+# PRECOMPUTED TRIGGER TIME (Event.custom_reminder_at)
+# ---------------------------------------------------------
+def get_reminder_minutes_map():
+    """
+    {user_id: custom_event_reminder} for all Employees, loaded with one
+    query and kept in cache until an Employee's setting changes.
+    """
+    minutes_map = frappe.cache().get_value(REMINDER_MINUTES_CACHE_KEY)
+    if minutes_map is not None:
+        return minutes_map
+
+    minutes_map = {}
+    for row in frappe.get_all(
+        "Employee",
+        filters=[["user_id", "is", "set"], ["custom_event_reminder", ">", 0]],
+        fields=["user_id", "custom_event_reminder"],
+        order_by="creation asc"
+    ):
+        minutes_map.setdefault(row.user_id, cint(row.custom_event_reminder))
+
+    frappe.cache().set_value(REMINDER_MINUTES_CACHE_KEY, minutes_map)
+    return minutes_map
+
+
+def clear_reminder_minutes_cache():
+    frappe.cache().delete_value(REMINDER_MINUTES_CACHE_KEY)
+
+
+def get_reminder_minutes(user, minutes_map=None):
+    """
+    Owner's Employee.custom_event_reminder, DEFAULT_REMINDER_MINUTES if unset.
+    """
+    if minutes_map is None:
+        minutes_map = get_reminder_minutes_map()
+
+    return minutes_map.get(user) or DEFAULT_REMINDER_MINUTES
+
+
+def set_reminder_time(doc, method=None):
+    """
+    Event validate hook: store the trigger time in the same save.
+    """
+    if doc.send_reminder and doc.starts_on:
+        doc.custom_reminder_at = add_to_date(
+            doc.starts_on,
+            minutes=-get_reminder_minutes(doc.owner or frappe.session.user)
+        )
+    else:
+        doc.custom_reminder_at = None
+
+
+def update_owner_reminder_times(user, minutes_map=None):
+    """
+    Recompute custom_reminder_at of the user's pending events in one UPDATE.
+    """
+    if not user:
+        return
+
+    frappe.db.sql(
+        """
+        UPDATE `tabEvent`
+        SET custom_reminder_at = DATE_SUB(starts_on, INTERVAL %(minutes)s MINUTE)
+        WHERE owner = %(user)s
+          AND send_reminder = 1
+          AND custom_reminder_sent = 0
+          AND starts_on > %(now)s
+        """,
+        {"user": user, "minutes": get_reminder_minutes(user, minutes_map), "now": now_datetime()}
+    )
+
+
+def handle_employee_reminder_change(doc, method=None):
+    """
+    Employee on_update hook: reminder minutes or linked user changed.
+    """
+    if not (doc.has_value_changed("custom_event_reminder") or doc.has_value_changed("user_id")):
+        return
+
+    # again after commit: a concurrent tick may re-cache the old setting
+    clear_reminder_minutes_cache()
+    frappe.db.after_commit.add(clear_reminder_minutes_cache)
+
+    update_owner_reminder_times(doc.user_id)
+
+    before = doc.get_doc_before_save()
+    if before and before.user_id and before.user_id != doc.user_id:
+        update_owner_reminder_times(before.user_id)
+
+
+def handle_employee_delete(doc, method=None):
+    """
+    Employee after_delete hook: the user's events fall back to the default.
+    """
+    if not doc.user_id:
+        return
+
+    clear_reminder_minutes_cache()
+    frappe.db.after_commit.add(clear_reminder_minutes_cache)
+
+    update_owner_reminder_times(doc.user_id)
+
+
+def backfill_reminder_times():
+    """
+    after_migrate: fill custom_reminder_at for pending events that predate it.
+    """
+    if not frappe.db.has_column("Event", "custom_reminder_at"):
+        return
+
+    owners = frappe.db.sql_list(
+        """
+        SELECT DISTINCT owner
+        FROM `tabEvent`
+        WHERE custom_reminder_at IS NULL
+          AND send_reminder = 1
+          AND custom_reminder_sent = 0
+          AND starts_on > %(now)s
+        """,
+        {"now": now_datetime()}
+    )
+
+    minutes_map = get_reminder_minutes_map()
+    for owner in owners:
+        update_owner_reminder_times(owner, minutes_map)
@@ -0,0 +1,285 @@
+import csv
+import io
+import os
+import tempfile
+import frappe
+from frappe.utils import nowdate
+from werkzeug.wrappers import Response
+from erpnext_crm_api.api.utils import api_error, get_all_where
+from erpnext_crm_api.api.projection import resolve_fields
+
+
+# ---------------------------------------------------------
+# STREAMING EXPORT
+# Same filters / search / sort as the list endpoints, without
+# pagination. Rows are read through an unbuffered (server side)
+# cursor and written to the response as they arrive.
+# ---------------------------------------------------------
+EXPORT_FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+# rows per CSV chunk written to the response
+EXPORT_CHUNK_ROWS = 1000
+
+SALES_INVOICE_EXPORT_FIELDS = [
+    "name",
+    "posting_date",
+    "due_date",
+    "customer",
+    "company",
+    "grand_total",
+    "currency",
+    "docstatus",
+    "modified"
+]
+
+
+def get_export_query(doctype, fields, filters, search, search_fields, sort_by, sort_order):
+    """
+    SELECT for the export, built by get_all_where (run=0) from the same
+    filters and search conditions get_paginated_data uses. A FULLTEXT
+    search is an uncapped MATCH condition, so every match is exported.
+    """
+    or_filters = []
+    conditions = []
+
+    if search and search_fields:
+        from erpnext_crm_api.api.search import get_search_filters
+        or_filters, conditions = get_search_filters(
+            doctype, search.strip(), search_fields
+        )
+
+    if sort_by == "relevance":
+        sort_by = "modified"
+    sort_order = "desc" if sort_order.lower() == "desc" else "asc"
+
+    return get_all_where(
+        doctype,
+        conditions,
+        fields=fields,
+        filters=filters,
+        or_filters=or_filters,
+        order_by=f"{sort_by} {sort_order}",
+        run=0
+    )
+
+
+def iter_rows(query):
+    """
+    Yield result rows one by one from an unbuffered cursor.
+
+    A streamed response is consumed after the request has been torn
+    down, so the generator connects to the site again when needed.
+    """
+    site = frappe.local.site
+    sites_path = frappe.local.sites_path
+    user = frappe.session.user
+
+    def generate():
+        connected = False
+        if not getattr(frappe.local, "db", None):
+            frappe.init(site=site, sites_path=sites_path)
+            frappe.connect()
+            frappe.set_user(user)
+            connected = True
+
+        try:
+            with frappe.db.unbuffered_cursor():
+                yield from frappe.db.sql(query, as_iterator=True)
+        finally:
+            if connected:
+                frappe.destroy()
+
+    return generate()
+
+
+def stream_csv(header, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(header)
+    count = 1
+
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+
+        if count >= EXPORT_CHUNK_ROWS:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+            count = 0
+
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def stream_xlsx(header, rows, sheet_name):
+    """
+    Write-only workbook (rows go straight to a temp file), then stream
+    the file back in blocks.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(sheet_name[:31])
+    sheet.append(header)
+
+    for row in rows:
+        sheet.append(list(row))
+
+    fd, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+
+    try:
+        workbook.save(path)
+        with open(path, "rb") as f:
+            while block := f.read(64 * 1024):
+                yield block
+    finally:
+        os.remove(path)
+
+
+def export_response(doctype, fields, filters, search, search_fields, sort_by, sort_order, file_format):
+    file_format = (file_format or "csv").lower()
+    if file_format not in EXPORT_FORMATS:
+        return api_error(f"Unsupported format: {file_format}", 400)
+
+    if not frappe.has_permission(doctype, "read"):
+        return api_error("Not permitted", 403)
+
+    try:
+        query = get_export_query(doctype, fields, filters, search, search_fields, sort_by, sort_order)
+    except frappe.ValidationError as e:
+        return api_error(str(e), 400)
+
+    rows = iter_rows(query)
+
+    if file_format == "csv":
+        body = stream_csv(fields, rows)
+    else:
+        body = stream_xlsx(fields, rows, doctype)
+
+    filename = f"{frappe.scrub(doctype)}_{nowdate()}.{file_format}"
+
+    response = Response(body, mimetype=EXPORT_FORMATS[file_format], direct_passthrough=True)
+    response.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+
+# ---------------------------------------------------------
+# EXPORT ENDPOINTS
+# ---------------------------------------------------------
+@frappe.whitelist(methods=["GET"])
+def export_leads(
+    format="csv",
+    sort_by="modified",
+    sort_order="desc",
+    search=None,
+    status=None,
+    source=None,
+    fields="export"
+):
+    """
+    API: Stream Leads as CSV / XLSX (filters as in list_leads)
+    """
+    filters = {}
+    if status:
+        filters["status"] = status
+    if source:
+        filters["source"] = source
+
+    try:
+        fields = resolve_fields("Lead", fields, default_preset="export")
+    except frappe.ValidationError as e:
+        return api_error(str(e), 400)
+
+    return export_response(
+        "Lead",
+        fields,
+        filters,
+        search,
+        ["first_name", "last_name", "email_id", "mobile_no", "company_name"],
+        sort_by,
+        sort_order,
+        format
+    )
+
+
+@frappe.whitelist(methods=["GET"])
+def export_opportunities(
+    format="csv",
+    sort_by="modified",
+    sort_order="desc",
+    search=None,
+    status=None,
+    source=None,
+    opportunity_from=None,
+    company=None,
+    fields="export"
+):
+    """
+    API: Stream Opportunities as CSV / XLSX (filters as in list_opportunity)
+    """
+    filters = {}
+    if status:
+        filters["status"] = status
+    if source:
+        filters["source"] = source
+    if opportunity_from:
+        filters["opportunity_from"] = opportunity_from
+    if company:
+        filters["company"] = company
+
+    try:
+        fields = resolve_fields("Opportunity", fields, default_preset="export")
+    except frappe.ValidationError as e:
+        return api_error(str(e), 400)
+
+    return export_response(
+        "Opportunity",
+        fields,
+        filters,
+        search,
+        ["party_name", "contact_email", "contact_mobile", "source", "company"],
+        sort_by,
+        sort_order,
+        format
+    )
+
+
+@frappe.whitelist(methods=["GET"])
+def export_sales_invoices(
+    format="csv",
+    sort_by="modified",
+    sort_order="desc",
+    search=None,
+    status=None,
+    customer=None,
+    company=None
+):
+    """
+    API: Stream Sales Invoices as CSV / XLSX (filters as in list_sales_invoices)
+    """
+    filters = {}
+    if status:
+        # For Sales Invoice, status can be "Draft", "Submitted", "Cancelled"
+        filters["docstatus"] = {"Draft": 0, "Submitted": 1, "Cancelled": 2}.get(status, None)
+    if customer:
+        filters["customer"] = customer
+    if company:
+        filters["company"] = company
+
+    return export_response(
+        "Sales Invoice",
+        SALES_INVOICE_EXPORT_FIELDS,
+        filters,
+        search,
+        ["name", "customer", "company", "currency"],
+        sort_by,
+        sort_order,
+        format
+    )
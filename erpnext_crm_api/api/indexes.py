@@ -0,0 +1,243 @@
+import frappe
+from frappe import _
+from frappe.utils import add_months, add_days, nowdate, now_datetime
+from erpnext_crm_api.api.utils import api_response, api_error
+
+
+# ---------------------------------------------------------
+# COMPOSITE INDEXES (CREATED ON INSTALL / MIGRATE)
+# doctype → list of column lists, leading column first
+# An expected index counts as present when any existing index
+# starts with the same columns in the same order.
+# ---------------------------------------------------------
+INDEXES = {
+    # dashboard: reference_doctype = ? AND rollup_date BETWEEN ? [AND company / owner_user = ?]
+    "CRM Daily Rollup": [
+        ["reference_doctype", "rollup_date"],
+        ["reference_doctype", "company", "rollup_date"],
+        ["reference_doctype", "owner_user", "rollup_date"],
+    ],
+    # lead_dedup: exact key / trigram lookups
+    "CRM Lead Dedup Key": [
+        ["key_type", "key_value"],
+        ["lead", "key_type"],
+    ],
+    # batch_operation: unfinished items of a shard / stalled batches
+    "CRM Batch Operation Item": [
+        ["parent", "shard", "status"],
+    ],
+    "CRM Batch Operation": [
+        ["status", "modified"],
+    ],
+    # event_reminder: due reminder scan (range on the precomputed trigger time)
+    "Event": [
+        ["status", "send_reminder", "custom_reminder_sent"],
+        ["custom_reminder_sent", "custom_reminder_at"],
+    ],
+    # custom_notification: assignments of an event
+    "ToDo": [
+        ["reference_type", "reference_name"],
+    ],
+    # rollup rebuild / reports over a window per status
+    "Opportunity": [
+        ["status", "creation", "company"],
+    ],
+    "Lead": [
+        ["creation", "source"],
+    ],
+    # event_reminder: owner → reminder minutes map, Event validate
+    "Employee": [
+        ["user_id"],
+    ],
+    # item: selling rates of a price list
+    "Item Price": [
+        ["price_list", "item_code"],
+    ],
+}
+
+
+# ---------------------------------------------------------
+# HOT QUERIES (EXPLAINED BY get_index_report)
+# ---------------------------------------------------------
+def get_hot_queries():
+    to_date = nowdate()
+    from_date = add_months(to_date, -3)
+
+    return [
+        {
+            "name": "event_reminder_due_events",
+            "sql": """
+                SELECT name, subject, starts_on, owner, all_day
+                FROM `tabEvent`
+                WHERE custom_reminder_sent = 0
+                  AND custom_reminder_at BETWEEN %(catch_up)s AND %(now)s
+                  AND starts_on > %(now)s
+                  AND status = 'Open' AND send_reminder = 1
+            """,
+            "values": {"catch_up": add_days(now_datetime(), -1), "now": now_datetime()}
+        },
+        {
+            "name": "event_reminder_employee_minutes",
+            "sql": """
+                SELECT user_id, custom_event_reminder
+                FROM `tabEmployee`
+                WHERE IFNULL(user_id, '') != '' AND custom_event_reminder > 0
+            """,
+            "values": {}
+        },
+        {
+            "name": "event_assignments",
+            "sql": """
+                SELECT t.name, t.reference_name, t.allocated_to, t.status, e.subject, e.starts_on
+                FROM `tabToDo` t
+                INNER JOIN `tabEvent` e
+                    ON e.name = t.reference_name AND e.starts_on > %(day_end)s
+                WHERE t.reference_type = 'Event'
+                ORDER BY t.creation DESC, t.name DESC
+                LIMIT 20
+            """,
+            "values": {"day_end": nowdate() + " 23:59:59"}
+        },
+        {
+            "name": "dashboard_rollup_window",
+            "sql": """
+                SELECT status, SUM(record_count)
+                FROM `tabCRM Daily Rollup`
+                WHERE reference_doctype = 'Opportunity'
+                  AND rollup_date BETWEEN %(from_date)s AND %(to_date)s
+                GROUP BY status
+            """,
+            "values": {"from_date": from_date, "to_date": to_date}
+        },
+        {
+            "name": "opportunity_status_window",
+            "sql": """
+                SELECT COUNT(*)
+                FROM `tabOpportunity`
+                WHERE status = 'Open'
+                  AND creation BETWEEN %(from_date)s AND %(to_date)s
+            """,
+            "values": {"from_date": from_date, "to_date": to_date}
+        },
+        {
+            "name": "lead_source_window",
+            "sql": """
+                SELECT source, COUNT(*)
+                FROM `tabLead`
+                WHERE creation BETWEEN %(from_date)s AND %(to_date)s
+                GROUP BY source
+            """,
+            "values": {"from_date": from_date, "to_date": to_date}
+        },
+        {
+            "name": "item_selling_prices",
+            "sql": """
+                SELECT item_code, price_list_rate
+                FROM `tabItem Price`
+                WHERE price_list = %(price_list)s AND item_code IN %(items)s AND selling = 1
+            """,
+            "values": {"price_list": "Standard Selling", "items": ("ITEM-0001", "ITEM-0002")}
+        },
+    ]
+
+
+def get_index_name(columns):
+    return "crm_api_" + "_".join(columns)
+
+
+def get_table_indexes(doctype):
+    """
+    {index_name: [columns in index order]} for the doctype's table.
+    """
+    indexes = {}
+    for row in frappe.db.sql(f"SHOW INDEX FROM `tab{doctype}`", as_dict=True):
+        indexes.setdefault(row.Key_name, []).append((row.Seq_in_index, row.Column_name))
+
+    return {
+        name: [column for _seq, column in sorted(columns)]
+        for name, columns in indexes.items()
+    }
+
+
+def find_covering_index(table_indexes, columns):
+    for name, index_columns in table_indexes.items():
+        if index_columns[:len(columns)] == list(columns):
+            return name
+
+    return None
+
+
+def get_index_status():
+    """
+    One row per expected index: present / missing / not applicable.
+    """
+    status = []
+
+    for doctype, indexes in INDEXES.items():
+        table_exists = frappe.db.table_exists(doctype)
+        table_indexes = get_table_indexes(doctype) if table_exists else {}
+
+        for columns in indexes:
+            applicable = table_exists and all(frappe.db.has_column(doctype, c) for c in columns)
+            index_name = find_covering_index(table_indexes, columns) if applicable else None
+
+            status.append({
+                "doctype": doctype,
+                "columns": columns,
+                "applicable": applicable,
+                "present": bool(index_name),
+                "index_name": index_name
+            })
+
+    return status
+
+
+def ensure_indexes():
+    """
+    Create expected indexes that no existing index covers, then verify.
+    Tables / columns that are not installed are skipped.
+    """
+    for row in get_index_status():
+        if row["applicable"] and not row["present"]:
+            frappe.db.add_index(row["doctype"], row["columns"], index_name=get_index_name(row["columns"]))
+
+    missing = [
+        row for row in get_index_status()
+        if row["applicable"] and not row["present"]
+    ]
+    if missing:
+        frappe.log_error(
+            title="CRM API: indexes missing after migrate",
+            message=frappe.as_json(missing)
+        )
+
+    return missing
+
+
+@frappe.whitelist()
+def get_index_report():
+    """
+    API: Expected composite indexes and EXPLAIN of each hot query (System Manager only)
+    """
+    if "System Manager" not in frappe.get_roles():
+        return api_error("Not permitted", 403)
+
+    status = get_index_status()
+
+    explain = []
+    for query in get_hot_queries():
+        try:
+            plan = frappe.db.sql("EXPLAIN " + query["sql"], query["values"], as_dict=True)
+            explain.append({"name": query["name"], "plan": plan})
+        except Exception as e:
+            explain.append({"name": query["name"], "error": str(e)})
+
+    return api_response(
+        data={
+            "missing": [row for row in status if row["applicable"] and not row["present"]],
+            "indexes": status,
+            "explain": explain
+        },
+        message=_("Index Report Fetched Successfully"),
+        flatten=True
+    )
@@ -90,8 +90,10 @@
 import frappe
 from frappe import _
 from erpnext_crm_api.api.utils import api_response, api_error, get_paginated_data
+from erpnext_crm_api.api.master_cache import cached_master_list
 
 @frappe.whitelist(allow_guest=False)
+@cached_master_list("Industry Type")
 def get_industry_list(
     search=None,
     page=1,
@@ -116,6 +118,7 @@ def get_industry_list(
                 "page": int(page),
                 "page_size": int(page_size),
                 "total_records": result["count"],
+                "count_mode": result["count_mode"],
                 "total_pages": result["total_pages"],
                 "data": result["results"]
             },
@@ -1,8 +1,10 @@
 import frappe
 from frappe import _
-from erpnext_crm_api.api.utils import api_response, api_error
+from erpnext_crm_api.api.utils import api_response, api_error, count_records
+from erpnext_crm_api.api.master_cache import cached_master_list
 
 @frappe.whitelist(allow_guest=False)
+@cached_master_list("Language")
 def get_language_list(
     search=None,
     sort_by="language_name",
@@ -50,13 +52,10 @@ def get_language_list(
     # ---------------------------
     # Total Count (SAFE)
     # ---------------------------
-    total_count = len(
-        frappe.get_all(
-            "Language",
-            filters=filters,
-            or_filters=or_filters,
-            pluck="name"
-        )
+    total_count, count_mode = count_records(
+        "Language",
+        filters=filters,
+        or_filters=or_filters
     )
 
     # ---------------------------
@@ -85,6 +84,7 @@ def get_language_list(
             "page": page,
             "page_size": page_size,
             "total_records": total_count,
+            "count_mode": count_mode,
             "total_pages": (total_count + page_size - 1) // page_size,
             "data": languages
         },
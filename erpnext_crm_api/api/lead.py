@@ -1,7 +1,26 @@
 import frappe
 import json
+import time
 from frappe import _
-from erpnext_crm_api.api.utils import api_response, api_error
+from frappe.utils import cint
+from erpnext_crm_api.api.utils import (
+    api_response,
+    api_error,
+    get_paginated_data,
+    with_etag,
+    get_doc_etag,
+    not_modified_response
+)
+from erpnext_crm_api.api.projection import resolve_fields
+from erpnext_crm_api.api.lead_dedup import (
+    IDENTITY_KEY_TYPES,
+    MAX_POSSIBLE_DUPLICATES,
+    is_dedup_gate_enabled,
+    find_duplicates,
+    split_duplicates,
+    find_leads_by_keys,
+    get_payload_keys
+)
 
 
 @frappe.whitelist()
@@ -21,8 +40,36 @@ def create_lead(data=None):
     if not data.get("status"):
         api_error("status is required", 400)
 
+    # Optional dedup gate (payload `dedup` or site_config crm_api_lead_dedup_gate)
+    # email / phone matches block, company / name matches are returned as hints
+    response_data = {}
+    if is_dedup_gate_enabled(data.get("dedup")):
+        blocking, possible = split_duplicates(
+            find_duplicates(data, fuzzy=True, limit=MAX_POSSIBLE_DUPLICATES)
+        )
+        if blocking:
+            return api_error(f"Duplicate of existing lead(s): {', '.join(blocking)}", 409)
+
+        response_data["possible_duplicates"] = [
+            {"lead": lead, **entry} for lead, entry in possible.items()
+        ]
+
     lead = frappe.new_doc("Lead")
+    set_lead_values(lead, data)
+
+    lead.insert(ignore_permissions=True)
+
+    return api_response(
+        data={"lead_id": lead.name, **response_data},
+        message="Lead created successfully",
+        status_code=201
+    )
 
+
+def set_lead_values(lead, data):
+    """
+    Copy API payload keys onto a Lead (create_lead / bulk_create_leads).
+    """
     # ---- Basic Info ----
     lead.salutation = data.get("salutation")
     lead.first_name = data.get("first_name")
@@ -70,12 +117,291 @@ def create_lead(data=None):
     lead.unsubscribed = data.get("unsubscribed", 0)
     lead.blog_subscriber = data.get("blog_subscriber", 0)
 
-    lead.insert(ignore_permissions=True)
+
+# ---------------------------------------------------------
+# BULK LEAD IMPORT
+# Link fields are checked with one query per doctype for the whole
+# payload; rows are inserted in batches, each batch committed on its
+# own, a failing row only rolls back to its savepoint.
+# ---------------------------------------------------------
+# payload key → linked doctype (every Link set by set_lead_values)
+BULK_LEAD_LINK_FIELDS = {
+    "source": "Lead Source",
+    "industry": "Industry Type",
+    "territory": "Territory",
+    "market_segment": "Market Segment",
+    "gender": "Gender",
+    "country": "Country",
+    "campaign_name": "Campaign",
+    "company": "Company",
+    "qualified_by": "User",
+    "print_language": "Language",
+    "salutation": "Salutation",
+}
+
+# JSON cell types accepted by the bulk import (lists / objects are rejected)
+BULK_LEAD_CELL_TYPES = (str, int, float, bool, type(None))
+
+DEFAULT_BULK_LEAD_BATCH_SIZE = 500
+MAX_BULK_LEAD_BATCH_SIZE = 5000
+
+# payloads above this size run as a background job
+BULK_LEAD_SYNC_LIMIT = 1000
+
+BULK_LEAD_JOB_PREFIX = "crm_api_bulk_lead_import"
+BULK_LEAD_RESULT_EXPIRY = 86400
+
+
+def get_bulk_batch_size(batch_size=None):
+    """
+    batch_size argument, else site_config `crm_api_bulk_lead_batch_size`.
+    """
+    batch_size = cint(batch_size) or cint(frappe.conf.get("crm_api_bulk_lead_batch_size")) \
+        or DEFAULT_BULK_LEAD_BATCH_SIZE
+    return min(max(batch_size, 1), MAX_BULK_LEAD_BATCH_SIZE)
+
+
+def validate_lead_rows(rows, check_duplicates=False):
+    """
+    ({row index: error}, {row index: [lead, ...]}) for rows that cannot be
+    inserted, and valid rows that look like existing leads.
+    With check_duplicates, rows matching an existing lead or an earlier
+    row of the payload on email / phone are rejected; company / name
+    matches are only reported as possible duplicates.
+
+    Link values are matched case-insensitively, as the database matches
+    them, and valid rows get the canonical names written back (links are
+    not re-validated on insert, see import_leads).
+    """
+    existing = {}
+    for field, doctype in BULK_LEAD_LINK_FIELDS.items():
+        values = {
+            row[field] for row in rows
+            if isinstance(row, dict) and isinstance(row.get(field), str) and row[field]
+        }
+        # lowercased → canonical name
+        existing[field] = {
+            name.lower(): name
+            for name in frappe.get_all(doctype, filters={"name": ["in", list(values)]}, pluck="name")
+        } if values else {}
+
+    errors = {}
+    for idx, row in enumerate(rows):
+        if not isinstance(row, dict):
+            errors[idx] = "Row must be an object"
+            continue
+
+        nested = [field for field, value in row.items() if not isinstance(value, BULK_LEAD_CELL_TYPES)]
+        if nested:
+            errors[idx] = f"{', '.join(map(str, nested))} must be a single value"
+            continue
+
+        missing = [field for field in ("first_name", "status") if not row.get(field)]
+        if missing:
+            errors[idx] = f"{', '.join(missing)} is required"
+            continue
+
+        invalid = [
+            f"{field} '{row[field]}' does not exist"
+            for field in BULK_LEAD_LINK_FIELDS
+            if row.get(field) and str(row[field]).lower() not in existing[field]
+        ]
+        if invalid:
+            errors[idx] = "; ".join(invalid)
+            continue
+
+        for field in BULK_LEAD_LINK_FIELDS:
+            if row.get(field):
+                row[field] = existing[field][str(row[field]).lower()]
+
+    possible_duplicates = {}
+    if check_duplicates:
+        duplicate_errors, possible_duplicates = get_duplicate_rows(rows, errors)
+        errors.update(duplicate_errors)
+
+    return errors, possible_duplicates
+
+
+def get_duplicate_rows(rows, errors):
+    """
+    One dedup index lookup for the keys of every valid row.
+    Returns ({row index: error}, {row index: [lead, ...]}): identity key
+    (email / phone) matches are errors, company / name matches are hints.
+    """
+    row_keys = {
+        idx: get_payload_keys(row)
+        for idx, row in enumerate(rows)
+        if idx not in errors
+    }
+    existing = find_leads_by_keys(set().union(*row_keys.values())) if row_keys else {}
+
+    duplicate_errors = {}
+    possible_duplicates = {}
+    seen = {}
+    for idx, keys in row_keys.items():
+        identity_keys = [key for key in keys if key[0] in IDENTITY_KEY_TYPES]
+        leads = sorted({lead for key in identity_keys for lead in existing.get(key, [])})
+        earlier = sorted({seen[key] for key in identity_keys if key in seen})
+
+        if leads:
+            duplicate_errors[idx] = f"Duplicate of existing lead(s): {', '.join(leads)}"
+        elif earlier:
+            duplicate_errors[idx] = f"Duplicate of row(s): {', '.join(map(str, earlier))}"
+        else:
+            for key in identity_keys:
+                seen.setdefault(key, idx)
+
+            possible = sorted({lead for key in keys for lead in existing.get(key, [])})
+            if possible:
+                possible_duplicates[idx] = possible
+
+    return duplicate_errors, possible_duplicates
+
+
+def import_leads(rows, batch_size=None, dedup=False):
+    """
+    Insert rows as Leads; returns per-row results and throughput stats.
+    """
+    start = time.monotonic()
+    batch_size = get_bulk_batch_size(batch_size)
+
+    errors, possible_duplicates = validate_lead_rows(rows, check_duplicates=dedup)
+    results = [None] * len(rows)
+
+    for idx, error in errors.items():
+        results[idx] = {"row": idx, "status": "error", "error": error}
+
+    pending = [idx for idx in range(len(rows)) if idx not in errors]
+
+    for batch_start in range(0, len(pending), batch_size):
+        for idx in pending[batch_start:batch_start + batch_size]:
+            savepoint = f"bulk_lead_{idx}"
+            frappe.db.savepoint(savepoint)
+
+            try:
+                lead = frappe.new_doc("Lead")
+                set_lead_values(lead, rows[idx])
+                # links were checked for the whole payload in validate_lead_rows
+                lead.flags.ignore_links = True
+                lead.insert(ignore_permissions=True)
+                results[idx] = {"row": idx, "status": "success", "lead_id": lead.name}
+                if idx in possible_duplicates:
+                    results[idx]["possible_duplicates"] = possible_duplicates[idx]
+
+            except Exception as e:
+                frappe.db.rollback(save_point=savepoint)
+                frappe.clear_messages()
+                results[idx] = {"row": idx, "status": "error", "error": str(e)}
+
+        frappe.db.commit()
+
+    duration = time.monotonic() - start
+    created = len([r for r in results if r["status"] == "success"])
+
+    return {
+        "results": results,
+        "stats": {
+            "total": len(rows),
+            "created": created,
+            "failed": len(rows) - created,
+            "batch_size": batch_size,
+            "duration_seconds": round(duration, 3),
+            "rows_per_second": round(len(rows) / duration, 2) if duration else len(rows)
+        }
+    }
+
+
+def run_bulk_lead_import(job_id, rows, batch_size=None, dedup=False):
+    """
+    Background job: import and keep the result for get_bulk_lead_import_status.
+    """
+    key = f"{BULK_LEAD_JOB_PREFIX}:{job_id}"
+    entry = frappe.cache().get_value(key) or {}
+
+    try:
+        entry.update({"status": "Completed", **import_leads(rows, batch_size, dedup)})
+    except Exception:
+        frappe.db.rollback()
+        entry.update({"status": "Failed", "error": frappe.get_traceback()})
+
+    frappe.cache().set_value(key, entry, expires_in_sec=BULK_LEAD_RESULT_EXPIRY)
+
+
+@frappe.whitelist(methods=["POST"])
+def bulk_create_leads(leads=None, batch_size=None, background=0, dedup=None):
+    """
+    API: Create many Leads in one call
+
+    leads      → list of create_lead payloads (or {"leads": [...]} JSON body)
+    batch_size → rows per committed batch
+    background → run as a background job (forced above BULK_LEAD_SYNC_LIMIT rows)
+    dedup      → reject duplicate rows (default: site_config crm_api_lead_dedup_gate)
+    """
+    if not leads:
+        try:
+            leads = json.loads(frappe.request.data or "{}").get("leads")
+        except Exception:
+            return api_error("Invalid JSON payload", 400)
+
+    if isinstance(leads, str):
+        leads = frappe.parse_json(leads)
+
+    dedup = is_dedup_gate_enabled(dedup)
+
+    if not isinstance(leads, list) or not leads:
+        return api_error("leads must be a non empty list", 400)
+
+    if cint(background) or len(leads) > BULK_LEAD_SYNC_LIMIT:
+        job_id = frappe.generate_hash(length=12)
+        frappe.cache().set_value(
+            f"{BULK_LEAD_JOB_PREFIX}:{job_id}",
+            {"status": "Queued", "user": frappe.session.user, "total": len(leads)},
+            expires_in_sec=BULK_LEAD_RESULT_EXPIRY
+        )
+        frappe.enqueue(
+            "erpnext_crm_api.api.lead.run_bulk_lead_import",
+            queue="long",
+            timeout=3600,
+            job_id=f"{BULK_LEAD_JOB_PREFIX}:{job_id}",
+            enqueue_after_commit=True,
+            rows=leads,
+            batch_size=batch_size,
+            dedup=dedup
+        )
+
+        return api_response(
+            data={"job_id": job_id, "total": len(leads)},
+            message=_("Lead import queued"),
+            status_code=202
+        )
+
+    result = import_leads(leads, batch_size, dedup)
 
     return api_response(
-        data={"lead_id": lead.name},
-        message="Lead created successfully",
-        status_code=201
+        data=result,
+        message=_("Leads imported"),
+        status_code=200
+    )
+
+
+@frappe.whitelist()
+def get_bulk_lead_import_status(job_id=None):
+    """
+    API: Status and per-row results of a background lead import
+    """
+    if not job_id:
+        return api_error("job_id is required", 400)
+
+    entry = frappe.cache().get_value(f"{BULK_LEAD_JOB_PREFIX}:{job_id}")
+    if not entry:
+        return api_error("Import job not found", 404)
+
+    if entry.get("user") != frappe.session.user and "System Manager" not in frappe.get_roles():
+        return api_error("Not permitted", 403)
+
+    return api_response(
+        data={"job_id": job_id, **entry},
+        message=_("Lead Import Status Fetched Successfully")
     )
 
 
@@ -178,11 +504,13 @@ def list_leads(
     sort_order="desc",
     search=None,
     status=None,
-    source=None
+    source=None,
+    cursor=None,
+    use_cursor=0,
+    fields=None
 ):
     page = int(page)
     page_size = int(page_size)
-    start = (page - 1) * page_size
 
     # -------------------
     # AND Filters
@@ -194,56 +522,44 @@ def list_leads(
         filters["source"] = source
 
     # -------------------
-    # OR Filters (Search)
+    # DATA QUERY (PROJECTED FIELDS)
+    # fields: preset (grid / card / export) or whitelisted columns
+    # Search: OR over name / contact columns
     # -------------------
-    or_filters = []
-    if search:
-        or_filters = [
-            ["Lead", "first_name", "like", f"%{search}%"],
-            ["Lead", "last_name", "like", f"%{search}%"],
-            ["Lead", "email_id", "like", f"%{search}%"],
-            ["Lead", "mobile_no", "like", f"%{search}%"],
-            ["Lead", "company_name", "like", f"%{search}%"],
-        ]
-
-    # -------------------
-    # DATA QUERY (ALL FIELDS)
-    # -------------------
-    leads = frappe.get_all(
-        "Lead",
-        fields=["*"],
-        filters=filters,
-        or_filters=or_filters,
-        order_by=f"{sort_by} {sort_order}",
-        limit_start=start,
-        limit_page_length=page_size
-    )
-
-    # -------------------
-    # TOTAL COUNT (FIXED)
-    # -------------------
-    total_count = len(
-        frappe.get_all(
-            "Lead",
+    try:
+        result = get_paginated_data(
+            doctype="Lead",
+            fields=resolve_fields("Lead", fields),
             filters=filters,
-            or_filters=or_filters,
-            pluck="name"
+            search=search,
+            search_fields=["first_name", "last_name", "email_id", "mobile_no", "company_name"],
+            sort_by=sort_by,
+            sort_order=sort_order,
+            page=page,
+            page_size=page_size,
+            cursor=cursor,
+            use_cursor=use_cursor
         )
-    )
+    except frappe.ValidationError as e:
+        return api_error(str(e), 400)
 
-    total_pages = (total_count + page_size - 1) // page_size
+    total_count = result["count"]
+    total_pages = result["total_pages"]
     return api_response(
     data={
         "page": page,
         "page_size": page_size,
         "total": total_count,
+        "count_mode": result["count_mode"],
         "total_pages": total_pages,
-        "next_page": page + 1 if page < total_pages else None,
+        "next_page": page + 1 if total_pages and page < total_pages else None,
         "prev_page": page - 1 if page > 1 else None,
-        "data": leads
+        "next_cursor": result["next_cursor"],
+        "data": result["results"]
     },
     message="Leads fetched successfully",
     status_code=200,
+    etag=True,
     flatten=True
 )
 
@@ -396,6 +712,12 @@ def get_lead_by_id(lead_name=None):
     if not frappe.db.exists("Lead", lead_name):
         frappe.throw(_("Lead '{0}' does not exist").format(lead_name))
 
+    # Client already has this version → 304
+    etag = get_doc_etag("Lead", lead_name)
+    not_modified = not_modified_response(etag)
+    if not_modified:
+        return not_modified
+
     # Fetch Lead fields
     lead = frappe.get_doc("Lead", lead_name)
 
@@ -439,11 +761,11 @@ def get_lead_by_id(lead_name=None):
         "modified": lead.modified
     }
 
-    return {
+    return with_etag({
         "status": "success",
         "message": "Lead fetched successfully",
         "data": lead_data
-    }
+    }, etag)
 
 
 
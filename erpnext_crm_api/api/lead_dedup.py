@@ -0,0 +1,441 @@
+import re
+import frappe
+from frappe import _
+from frappe.utils import cint, flt, now_datetime
+from erpnext_crm_api.api.utils import api_response, api_error
+
+
+# ---------------------------------------------------------
+# LEAD DEDUP INDEX
+# CRM Lead Dedup Key rows: (lead, key_type, key_value)
+#   email    → lowercased email
+#   phone    → E.164 mobile / whatsapp number
+#   company  → company name without case, punctuation and legal suffix
+#   name     → normalized lead name (exact)
+#   trigram  → 3-letter shingles of the name (fuzzy candidates)
+# Kept current by Lead doc_events, backfilled on migrate.
+# ---------------------------------------------------------
+DEDUP_DOCTYPE = "CRM Lead Dedup Key"
+
+# key types looked up exactly in the index
+EXACT_KEY_TYPES = ["email", "phone", "company", "name"]
+
+# key types that identify a person on their own: only these block
+# create_lead / bulk import, company / name / fuzzy matches are hints
+IDENTITY_KEY_TYPES = ["email", "phone"]
+
+COMPANY_SUFFIXES = {
+    "pvt", "private", "ltd", "limited", "llp", "llc", "inc", "incorporated",
+    "co", "corp", "corporation", "company", "plc", "gmbh"
+}
+
+DEFAULT_FUZZY_THRESHOLD = 0.5
+MAX_DUPLICATE_RESULTS = 50
+
+# possible_duplicates hints returned by create_lead
+MAX_POSSIBLE_DUPLICATES = 10
+
+
+def normalize_email(value):
+    value = (value or "").strip().lower()
+    return value if "@" in value else None
+
+
+def normalize_phone(value):
+    """
+    E.164 (+<country><number>). Numbers without a country code use the
+    site_config `crm_api_default_phone_region` (phonenumbers region, e.g. "IN").
+    """
+    value = (value or "").strip()
+    if not value:
+        return None
+
+    try:
+        import phonenumbers
+
+        region = frappe.conf.get("crm_api_default_phone_region")
+        parsed = phonenumbers.parse(value, region)
+        if phonenumbers.is_possible_number(parsed):
+            return phonenumbers.format_number(parsed, phonenumbers.PhoneNumberFormat.E164)
+    except Exception:
+        pass
+
+    # fallback: digits only, 00 → +
+    digits = re.sub(r"\D", "", value)
+    if value.startswith("00"):
+        digits = digits[2:]
+    return f"+{digits}" if len(digits) >= 7 else None
+
+
+def normalize_company(value):
+    words = re.sub(r"[^a-z0-9]+", " ", (value or "").lower()).split()
+    while len(words) > 1 and words[-1] in COMPANY_SUFFIXES:
+        words.pop()
+    return " ".join(words) or None
+
+
+def normalize_name(value):
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", (value or "").lower()).split()) or None
+
+
+def get_trigrams(name):
+    if not name:
+        return set()
+    padded = f"  {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def get_lead_name(data):
+    return " ".join(filter(None, [data.get("first_name"), data.get("last_name")]))
+
+
+def get_dedup_keys(email=None, phones=None, company_name=None, lead_name=None, with_trigrams=True):
+    """
+    {(key_type, key_value)} for the given values.
+    """
+    keys = set()
+
+    email = normalize_email(email)
+    if email:
+        keys.add(("email", email))
+
+    for phone in phones or []:
+        phone = normalize_phone(phone)
+        if phone:
+            keys.add(("phone", phone))
+
+    company = normalize_company(company_name)
+    if company:
+        keys.add(("company", company))
+
+    name = normalize_name(lead_name)
+    if name:
+        keys.add(("name", name))
+        if with_trigrams:
+            keys.update(("trigram", trigram) for trigram in get_trigrams(name))
+
+    return keys
+
+
+def get_lead_keys(doc):
+    return get_dedup_keys(
+        email=doc.get("email_id"),
+        phones=[doc.get("mobile_no"), doc.get("whatsapp_no")],
+        company_name=doc.get("company_name"),
+        lead_name=doc.get("lead_name") or get_lead_name(doc)
+    )
+
+
+def get_payload_keys(data, with_trigrams=False):
+    """
+    Keys of a create_lead payload (email / mobile_no / whatsapp / organization_name).
+    """
+    return get_dedup_keys(
+        email=data.get("email"),
+        phones=[data.get("mobile_no"), data.get("whatsapp")],
+        company_name=data.get("organization_name"),
+        lead_name=get_lead_name(data),
+        with_trigrams=with_trigrams
+    )
+
+
+# ---------------------------------------------------------
+# MAINTENANCE
+# ---------------------------------------------------------
+def insert_keys(lead, keys):
+    if not keys:
+        return
+
+    now = now_datetime()
+    user = frappe.session.user
+
+    frappe.db.bulk_insert(
+        DEDUP_DOCTYPE,
+        ["name", "lead", "key_type", "key_value", "creation", "modified", "owner", "modified_by", "docstatus"],
+        [
+            [frappe.generate_hash(length=10), lead, key_type, key_value, now, now, user, user, 0]
+            for key_type, key_value in keys
+        ]
+    )
+
+
+def update_dedup_keys(doc, method=None, *args):
+    """
+    doc_events hook (Lead on_update, on_trash, after_rename): only the
+    keys that changed are deleted / inserted.
+    """
+    if not frappe.db.table_exists(DEDUP_DOCTYPE):
+        return
+
+    if method == "after_rename":
+        old_name, new_name = args[0], args[1]
+        frappe.db.sql(
+            "UPDATE `tabCRM Lead Dedup Key` SET lead = %(new)s WHERE lead = %(old)s",
+            {"old": old_name, "new": new_name}
+        )
+        return
+
+    if method == "on_trash":
+        frappe.db.delete(DEDUP_DOCTYPE, {"lead": doc.name})
+        return
+
+    existing = {
+        (row.key_type, row.key_value): row.name
+        for row in frappe.get_all(
+            DEDUP_DOCTYPE,
+            filters={"lead": doc.name},
+            fields=["name", "key_type", "key_value"]
+        )
+    }
+    keys = get_lead_keys(doc)
+
+    stale = [name for key, name in existing.items() if key not in keys]
+    if stale:
+        frappe.db.delete(DEDUP_DOCTYPE, {"name": ["in", stale]})
+
+    insert_keys(doc.name, keys - set(existing))
+
+
+def rebuild_dedup_index():
+    """
+    Recompute every Lead's keys (backfill / reconciliation).
+    """
+    frappe.db.sql("DELETE FROM `tabCRM Lead Dedup Key`")
+
+    fields = ["name", "lead_name", "first_name", "last_name", "email_id", "mobile_no", "whatsapp_no", "company_name"]
+    last_name = ""
+
+    while True:
+        leads = frappe.get_all(
+            "Lead",
+            filters={"name": [">", last_name]},
+            fields=fields,
+            order_by="name asc",
+            limit_page_length=1000
+        )
+        if not leads:
+            break
+
+        for lead in leads:
+            insert_keys(lead.name, get_lead_keys(lead))
+
+        last_name = leads[-1].name
+        frappe.db.commit()
+
+
+def ensure_dedup_index():
+    """
+    after_install / after_migrate: backfill in the background if the index is empty.
+    """
+    if not frappe.db.table_exists(DEDUP_DOCTYPE):
+        return
+
+    if frappe.db.sql("SELECT name FROM `tabCRM Lead Dedup Key` LIMIT 1"):
+        return
+
+    if not frappe.db.sql("SELECT name FROM `tabLead` LIMIT 1"):
+        return
+
+    frappe.enqueue(
+        "erpnext_crm_api.api.lead_dedup.rebuild_dedup_index",
+        queue="long",
+        job_id="crm_api_rebuild_lead_dedup",
+        deduplicate=True,
+        enqueue_after_commit=True
+    )
+
+
+# ---------------------------------------------------------
+# LOOKUP
+# ---------------------------------------------------------
+def find_leads_by_keys(keys):
+    """
+    {(key_type, key_value): [lead, ...]} for exact keys, in one query.
+    """
+    values_by_type = {}
+    for key_type, key_value in keys:
+        if key_type in EXACT_KEY_TYPES:
+            values_by_type.setdefault(key_type, set()).add(key_value)
+
+    if not values_by_type:
+        return {}
+
+    conditions = []
+    values = {}
+    for i, (key_type, key_values) in enumerate(values_by_type.items()):
+        conditions.append(f"(key_type = %(type_{i})s AND key_value IN %(values_{i})s)")
+        values[f"type_{i}"] = key_type
+        values[f"values_{i}"] = tuple(key_values)
+
+    matches = {}
+    for row in frappe.db.sql(
+        f"""
+        SELECT lead, key_type, key_value
+        FROM `tabCRM Lead Dedup Key`
+        WHERE {" OR ".join(conditions)}
+        """,
+        values,
+        as_dict=True
+    ):
+        matches.setdefault((row.key_type, row.key_value), []).append(row.lead)
+
+    return matches
+
+
+def find_fuzzy_name_matches(lead_name, threshold=DEFAULT_FUZZY_THRESHOLD, limit=MAX_DUPLICATE_RESULTS):
+    """
+    [(lead, similarity)] whose name trigrams overlap `lead_name` by at
+    least `threshold` (Jaccard), best first.
+    """
+    trigrams = get_trigrams(normalize_name(lead_name))
+    if not trigrams:
+        return []
+
+    # a candidate needs at least threshold × |query| shared trigrams
+    min_shared = max(1, int(len(trigrams) * threshold))
+
+    candidates = frappe.db.sql(
+        """
+        SELECT lead, COUNT(*) AS shared
+        FROM `tabCRM Lead Dedup Key`
+        WHERE key_type = 'trigram' AND key_value IN %(trigrams)s
+        GROUP BY lead
+        HAVING shared >= %(min_shared)s
+        ORDER BY shared DESC
+        LIMIT %(limit)s
+        """,
+        {"trigrams": tuple(trigrams), "min_shared": min_shared, "limit": limit * 4},
+        as_dict=True
+    )
+    if not candidates:
+        return []
+
+    totals = dict(frappe.db.sql(
+        """
+        SELECT lead, COUNT(*)
+        FROM `tabCRM Lead Dedup Key`
+        WHERE key_type = 'trigram' AND lead IN %(leads)s
+        GROUP BY lead
+        """,
+        {"leads": tuple(row.lead for row in candidates)}
+    ))
+
+    scored = []
+    for row in candidates:
+        union = len(trigrams) + totals.get(row.lead, 0) - row.shared
+        similarity = row.shared / union if union else 0
+        if similarity >= threshold:
+            scored.append((row.lead, round(similarity, 4)))
+
+    scored.sort(key=lambda item: item[1], reverse=True)
+    return scored[:limit]
+
+
+def find_duplicates(data, fuzzy=False, threshold=DEFAULT_FUZZY_THRESHOLD, limit=MAX_DUPLICATE_RESULTS):
+    """
+    {lead: {"matched_on": [...], "similarity": float | None}} for a create_lead payload.
+    """
+    duplicates = {}
+
+    for (key_type, _key_value), leads in find_leads_by_keys(get_payload_keys(data)).items():
+        for lead in leads:
+            entry = duplicates.setdefault(lead, {"matched_on": [], "similarity": None})
+            if key_type not in entry["matched_on"]:
+                entry["matched_on"].append(key_type)
+
+    if fuzzy:
+        for lead, similarity in find_fuzzy_name_matches(get_lead_name(data), threshold, limit):
+            entry = duplicates.setdefault(lead, {"matched_on": [], "similarity": None})
+            entry["similarity"] = similarity
+            if "fuzzy_name" not in entry["matched_on"]:
+                entry["matched_on"].append("fuzzy_name")
+
+    return duplicates
+
+
+def split_duplicates(duplicates):
+    """
+    (blocking, possible) parts of a find_duplicates result: leads matched
+    on an identity key, and leads only matched on company / name / fuzzy name.
+    """
+    blocking, possible = {}, {}
+    for lead, entry in duplicates.items():
+        if any(key_type in IDENTITY_KEY_TYPES for key_type in entry["matched_on"]):
+            blocking[lead] = entry
+        else:
+            possible[lead] = entry
+    return blocking, possible
+
+
+def is_dedup_gate_enabled(dedup=None):
+    """
+    Request flag `dedup`, else site_config `crm_api_lead_dedup_gate`.
+    """
+    if dedup is not None and dedup != "":
+        return bool(cint(dedup))
+    return bool(cint(frappe.conf.get("crm_api_lead_dedup_gate")))
+
+
+@frappe.whitelist()
+def check_duplicate_leads(
+    email=None,
+    mobile_no=None,
+    whatsapp=None,
+    organization_name=None,
+    first_name=None,
+    last_name=None,
+    fuzzy=0,
+    threshold=DEFAULT_FUZZY_THRESHOLD,
+    limit=10
+):
+    """
+    API: Leads matching the given email / phone / company / name
+    Exact lookups on the dedup index; fuzzy=1 adds trigram name matches
+    """
+    if not frappe.has_permission("Lead", "read"):
+        return api_error("Not permitted", 403)
+
+    limit = min(max(cint(limit) or 10, 1), MAX_DUPLICATE_RESULTS)
+    threshold = min(max(flt(threshold) or DEFAULT_FUZZY_THRESHOLD, 0.1), 1)
+
+    data = {
+        "email": email,
+        "mobile_no": mobile_no,
+        "whatsapp": whatsapp,
+        "organization_name": organization_name,
+        "first_name": first_name,
+        "last_name": last_name
+    }
+    duplicates = find_duplicates(data, fuzzy=cint(fuzzy), threshold=threshold, limit=limit)
+
+    # strongest first: more exact keys, then fuzzy similarity
+    ranked = sorted(
+        duplicates.items(),
+        key=lambda item: (
+            len([k for k in item[1]["matched_on"] if k != "fuzzy_name"]),
+            item[1]["similarity"] or 0
+        ),
+        reverse=True
+    )[:limit]
+
+    leads = {
+        row.name: row
+        for row in frappe.get_all(
+            "Lead",
+            filters={"name": ["in", [lead for lead, _entry in ranked]]},
+            fields=["name", "lead_name", "email_id", "mobile_no", "company_name", "status", "lead_owner"]
+        )
+    } if ranked else {}
+
+    return api_response(
+        data={
+            "has_duplicates": bool(ranked),
+            "duplicates": [
+                {**leads[lead], **entry}
+                for lead, entry in ranked
+                if lead in leads
+            ]
+        },
+        message=_("Duplicate Check Completed"),
+        flatten=True
+    )
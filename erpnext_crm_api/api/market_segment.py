@@ -1,9 +1,11 @@
 import frappe
 from frappe import _
-from erpnext_crm_api.api.utils import api_response, api_error
+from erpnext_crm_api.api.utils import api_response, api_error, count_records
+from erpnext_crm_api.api.master_cache import cached_master_list
 
 
 @frappe.whitelist(allow_guest=False)
+@cached_master_list("Market Segment")
 def get_market_segment_list(
     search=None,
     sort_by="name",
@@ -46,13 +48,10 @@ def get_market_segment_list(
     # ---------------------------
     # Total Count (SAFE)
     # ---------------------------
-    total_count = len(
-        frappe.get_all(
-            "Market Segment",
-            filters=filters,
-            or_filters=or_filters,
-            pluck="name"
-        )
+    total_count, count_mode = count_records(
+        "Market Segment",
+        filters=filters,
+        or_filters=or_filters
     )
 
     # ---------------------------
@@ -76,6 +75,7 @@ def get_market_segment_list(
         "page": page,
         "page_size": page_size,
         "total_records": total_count,
+        "count_mode": count_mode,
         "total_pages": (total_count + page_size - 1) // page_size,
         "data": segments
     },
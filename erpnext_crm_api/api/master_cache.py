@@ -0,0 +1,143 @@
+import functools
+import hashlib
+import inspect
+import json
+import frappe
+from frappe import _
+from frappe.utils import cint
+from erpnext_crm_api.api.utils import (
+    api_response,
+    api_error,
+    incr_counter,
+    get_counters,
+    reset_counters,
+    with_etag
+)
+
+
+# ---------------------------------------------------------
+# MASTER DATA RESPONSE CACHE
+# key: crm_api_master_cache:<doctype>:<endpoint>:<hash(params, roles)>
+# ---------------------------------------------------------
+MASTER_CACHE_PREFIX = "crm_api_master_cache"
+MASTER_CACHE_STATS_KEY = "crm_api_master_cache_stats"
+DEFAULT_MASTER_CACHE_TTL = 3600
+
+
+def get_cache_ttl():
+    """
+    TTL in seconds from site_config `crm_api_master_cache_ttl` (0 disables caching).
+    """
+    ttl = frappe.conf.get("crm_api_master_cache_ttl")
+    return DEFAULT_MASTER_CACHE_TTL if ttl is None else cint(ttl)
+
+
+def get_doctype_prefix(doctype):
+    return f"{MASTER_CACHE_PREFIX}:{doctype}:"
+
+
+def make_cache_key(doctype, endpoint, params):
+    """
+    Cache key for an endpoint call. Params are normalized to strings so
+    page=1 and page="1" share an entry; roles are part of the key.
+    """
+    payload = json.dumps(
+        {
+            "params": {k: "" if v is None else str(v) for k, v in sorted(params.items())},
+            "roles": sorted(frappe.get_roles())
+        },
+        sort_keys=True
+    )
+    digest = hashlib.md5(payload.encode()).hexdigest()
+    return f"{get_doctype_prefix(doctype)}{endpoint}:{digest}"
+
+
+def cached_master_list(doctype):
+    """
+    Decorator for master list endpoints: serve successful responses from
+    frappe.cache until the TTL expires or `doctype` changes.
+    Successful responses are ETag tagged (utils.with_etag).
+    Place it below @frappe.whitelist().
+    """
+    def decorator(fn):
+        endpoint = f"{fn.__module__}.{fn.__name__}"
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            ttl = get_cache_ttl()
+            if ttl <= 0:
+                result = fn(*args, **kwargs)
+                if isinstance(result, dict) and result.get("status") == "success":
+                    return with_etag(result)
+                return result
+
+            bound = signature.bind_partial(*args, **kwargs)
+            bound.apply_defaults()
+            key = make_cache_key(doctype, endpoint, bound.arguments)
+
+            cached = frappe.cache().get_value(key)
+            if cached is not None:
+                incr_counter(MASTER_CACHE_STATS_KEY, f"{endpoint}|hit")
+                frappe.local.response["http_status_code"] = cached.get("status_code", 200)
+                return with_etag(cached)
+
+            incr_counter(MASTER_CACHE_STATS_KEY, f"{endpoint}|miss")
+            result = fn(*args, **kwargs)
+
+            if isinstance(result, dict) and result.get("status") == "success":
+                frappe.cache().set_value(key, result, expires_in_sec=ttl)
+                return with_etag(result)
+
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def clear_master_cache(doctype):
+    frappe.cache().delete_keys(get_doctype_prefix(doctype))
+
+
+def invalidate_master_cache(doc, method=None, *args):
+    """
+    doc_events hook: drop cached responses of the changed doctype now
+    and again after commit (a concurrent request may re-cache old rows).
+    """
+    doctype = doc.doctype
+    clear_master_cache(doctype)
+    frappe.db.after_commit.add(lambda: clear_master_cache(doctype))
+
+
+@frappe.whitelist()
+def get_master_cache_stats(reset=0):
+    """
+    API: Hit / miss counters per master list endpoint (System Manager only)
+    """
+    if "System Manager" not in frappe.get_roles():
+        return api_error("Not permitted", 403)
+
+    counters = get_counters(MASTER_CACHE_STATS_KEY)
+
+    endpoints = {}
+    for field, value in counters.items():
+        endpoint, _sep, outcome = field.rpartition("|")
+        stats = endpoints.setdefault(endpoint, {"hit": 0, "miss": 0})
+        stats[outcome] = value
+
+    for stats in endpoints.values():
+        total = stats["hit"] + stats["miss"]
+        stats["hit_ratio"] = round(stats["hit"] / total, 4) if total else 0
+
+    if cint(reset):
+        reset_counters(MASTER_CACHE_STATS_KEY)
+
+    return api_response(
+        data={
+            "ttl": get_cache_ttl(),
+            "endpoints": endpoints
+        },
+        message=_("Master Cache Stats Fetched Successfully"),
+        flatten=True
+    )
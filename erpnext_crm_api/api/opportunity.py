@@ -1,6 +1,7 @@
 import frappe
 from frappe import _
-from erpnext_crm_api.api.utils import api_response, api_error
+from erpnext_crm_api.api.utils import api_response, api_error, get_paginated_data, with_etag
+from erpnext_crm_api.api.projection import resolve_fields
 
 @frappe.whitelist()
 def create_opportunity(data=None):
@@ -210,11 +211,13 @@ def list_opportunity(
     status=None,
     source=None,
     opportunity_from=None,
-    company=None
+    company=None,
+    cursor=None,
+    use_cursor=0,
+    fields=None
 ):
     page = int(page)
     page_size = int(page_size)
-    start = (page - 1) * page_size
 
     # -------------------------
     # AND filters
@@ -230,55 +233,42 @@ def list_opportunity(
         filters["company"] = company
 
     # -------------------------
-    # OR filters (search)
+    # DATA QUERY (PROJECTED FIELDS)
+    # fields: preset (grid / card / export) or whitelisted columns
+    # Search: OR over party / contact columns
     # -------------------------
-    or_filters = []
-    if search:
-        or_filters = [
-            ["Opportunity", "party_name", "like", f"%{search}%"],
-            ["Opportunity", "contact_email", "like", f"%{search}%"],
-            ["Opportunity", "contact_mobile", "like", f"%{search}%"],
-            ["Opportunity", "source", "like", f"%{search}%"],
-            ["Opportunity", "company", "like", f"%{search}%"],
-        ]
-
-    # -------------------------
-    # DATA QUERY (ALL FIELDS)
-    # -------------------------
-    opportunities = frappe.get_all(
-        "Opportunity",
-        fields=["*"],   # ✅ ALL fields
-        filters=filters,
-        or_filters=or_filters,
-        order_by=f"{sort_by} {sort_order}",
-        limit_start=start,
-        limit_page_length=page_size
-    )
-
-    # -------------------------
-    # TOTAL COUNT (OR supported)
-    # -------------------------
-    total_count = len(
-        frappe.get_all(
-            "Opportunity",
+    try:
+        result = get_paginated_data(
+            doctype="Opportunity",
+            fields=resolve_fields("Opportunity", fields),
             filters=filters,
-            or_filters=or_filters,
-            pluck="name"
+            search=search,
+            search_fields=["party_name", "contact_email", "contact_mobile", "source", "company"],
+            sort_by=sort_by,
+            sort_order=sort_order,
+            page=page,
+            page_size=page_size,
+            cursor=cursor,
+            use_cursor=use_cursor
         )
-    )
+    except frappe.ValidationError as e:
+        return api_error(str(e), 400)
 
-    total_pages = (total_count + page_size - 1) // page_size
+    total_count = result["count"]
+    total_pages = result["total_pages"]
 
-    return {
+    return with_etag({
         "status": "success",
         "page": page,
         "page_size": page_size,
         "total": total_count,
+        "count_mode": result["count_mode"],
         "total_pages": total_pages,
-        "next_page": page + 1 if page < total_pages else None,
+        "next_page": page + 1 if total_pages and page < total_pages else None,
         "prev_page": page - 1 if page > 1 else None,
-        "data": opportunities
-    }
+        "next_cursor": result["next_cursor"],
+        "data": result["results"]
+    })
 
 
 
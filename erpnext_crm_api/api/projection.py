@@ -0,0 +1,135 @@
+import frappe
+from frappe import _
+from erpnext_crm_api.api.utils import api_response, api_error
+
+
+# ---------------------------------------------------------
+# LIST FIELD WHITELIST (PER DOCTYPE)
+# ---------------------------------------------------------
+ALLOWED_FIELDS = {
+    "Lead": [
+        "name", "lead_name", "salutation", "first_name", "middle_name", "last_name",
+        "gender", "status", "source", "type", "request_type", "image",
+        "email_id", "mobile_no", "phone", "whatsapp_no", "website", "phone_ext",
+        "company_name", "annual_revenue", "no_of_employees", "industry", "market_segment",
+        "city", "state", "country", "territory",
+        "qualification_status", "qualified_by", "qualified_on",
+        "campaign_name", "company", "lead_owner", "job_title", "language",
+        "disabled", "unsubscribed", "blog_subscriber",
+        "owner", "creation", "modified"
+    ],
+    "Opportunity": [
+        "name", "title", "opportunity_from", "party_name", "customer_name",
+        "status", "sales_stage", "opportunity_type", "source", "campaign",
+        "probability", "opportunity_amount", "currency", "company",
+        "transaction_date", "expected_closing", "opportunity_owner",
+        "contact_person", "contact_email", "contact_mobile", "job_title",
+        "whatsapp", "phone", "phone_ext",
+        "territory", "industry", "market_segment", "no_of_employees", "annual_revenue",
+        "city", "state", "country", "website",
+        "owner", "creation", "modified"
+    ],
+}
+
+
+# ---------------------------------------------------------
+# NAMED PRESETS
+# grid   → list/table screens
+# card   → compact mobile cards
+# export → every whitelisted column
+# ---------------------------------------------------------
+FIELD_PRESETS = {
+    "Lead": {
+        "grid": [
+            "name", "lead_name", "first_name", "last_name", "company_name", "status",
+            "source", "email_id", "mobile_no", "territory", "lead_owner", "modified"
+        ],
+        "card": [
+            "name", "lead_name", "company_name", "status", "email_id", "mobile_no",
+            "city", "image", "modified"
+        ],
+        "export": ALLOWED_FIELDS["Lead"],
+    },
+    "Opportunity": {
+        "grid": [
+            "name", "title", "opportunity_from", "party_name", "status", "sales_stage",
+            "opportunity_amount", "currency", "company", "transaction_date",
+            "expected_closing", "opportunity_owner", "modified"
+        ],
+        "card": [
+            "name", "title", "party_name", "status", "opportunity_amount", "currency",
+            "expected_closing", "modified"
+        ],
+        "export": ALLOWED_FIELDS["Opportunity"],
+    },
+}
+
+
+def resolve_fields(doctype, fields=None, default_preset=None):
+    """
+    Resolve a client `fields` value to a validated column list.
+
+    `fields` may be a preset name ("grid", "card", "export"), a comma
+    separated string, a JSON list or a list. Every column must be in the
+    doctype whitelist; raises frappe.ValidationError otherwise.
+    Columns missing from the installed schema are dropped, `name` is
+    always included. Without `fields` or `default_preset` all columns
+    (["*"]) are returned, as before field selection existed.
+    """
+    if doctype not in ALLOWED_FIELDS:
+        raise frappe.ValidationError(_("Field selection is not supported for {0}").format(doctype))
+
+    presets = FIELD_PRESETS.get(doctype, {})
+    fields = fields or default_preset
+    if not fields:
+        return ["*"]
+
+    if isinstance(fields, str):
+        fields = fields.strip()
+        if fields in presets:
+            fields = presets[fields]
+        elif fields.startswith("["):
+            try:
+                fields = frappe.parse_json(fields)
+            except ValueError:
+                raise frappe.ValidationError(_("Invalid fields parameter"))
+        else:
+            fields = [f.strip() for f in fields.split(",") if f.strip()]
+
+    if not isinstance(fields, (list, tuple)):
+        raise frappe.ValidationError(_("Invalid fields parameter"))
+
+    allowed = set(ALLOWED_FIELDS[doctype])
+    not_allowed = [f for f in fields if f not in allowed]
+    if not_allowed:
+        raise frappe.ValidationError(
+            _("Field(s) not allowed for {0}: {1}").format(doctype, ", ".join(map(str, not_allowed)))
+        )
+
+    valid_columns = set(frappe.get_meta(doctype).get_valid_columns())
+
+    resolved = ["name"]
+    for field in fields:
+        if field not in resolved and field in valid_columns:
+            resolved.append(field)
+
+    return resolved
+
+
+@frappe.whitelist()
+def get_field_presets(doctype=None):
+    """
+    API: Whitelisted columns and named presets for list projection
+    """
+    if doctype not in ALLOWED_FIELDS:
+        return api_error(f"Field selection is not supported for {doctype}", 400)
+
+    return api_response(
+        data={
+            "doctype": doctype,
+            "allowed_fields": ALLOWED_FIELDS[doctype],
+            "presets": FIELD_PRESETS.get(doctype, {})
+        },
+        message=_("Field Presets Fetched Successfully"),
+        flatten=True
+    )
@@ -1,6 +1,6 @@
 import frappe
 from frappe import _
-from erpnext_crm_api.api.utils import api_response, api_error
+from erpnext_crm_api.api.utils import api_response, api_error, get_paginated_data
 
 @frappe.whitelist()
 def create_quotation(data=None):
@@ -412,11 +412,12 @@ def list_quotation(
     status=None,
     quotation_to=None,   # Customer / Supplier
     company=None,
-    customer=None
+    customer=None,
+    cursor=None,
+    use_cursor=0
 ):
     page = int(page)
     page_size = int(page_size)
-    start = (page - 1) * page_size
 
     # -------------------------
     # AND filters
@@ -431,68 +432,54 @@ def list_quotation(
     if customer:
         filters["party_name"] = customer
 
-    # -------------------------
-    # OR filters (search)
-    # -------------------------
-    or_filters = []
-    if search:
-        or_filters = [
-            ["Quotation", "name", "like", f"%{search}%"],
-            ["Quotation", "party_name", "like", f"%{search}%"],
-            ["Quotation", "company", "like", f"%{search}%"],
-            ["Quotation", "status", "like", f"%{search}%"],
-            ["Quotation", "quotation_to", "like", f"%{search}%"],
-        ]
-
     # -------------------------
     # DATA QUERY
     # -------------------------
-    quotations = frappe.get_all(
-        "Quotation",
-        fields=[
-            "name",
-            "transaction_date",
-            "valid_till",
-            "quotation_to",
-            "party_name",
-            "company",
-            "status",
-            "grand_total",
-            "currency",
-            "modified"
-        ],
-        filters=filters,
-        or_filters=or_filters,
-        order_by=f"{sort_by} {sort_order}",
-        limit_start=start,
-        limit_page_length=page_size
-    )
-
-    # -------------------------
-    # TOTAL COUNT (supports OR)
-    # -------------------------
-    total_count = len(
-        frappe.get_all(
-            "Quotation",
+    try:
+        result = get_paginated_data(
+            doctype="Quotation",
+            fields=[
+                "name",
+                "transaction_date",
+                "valid_till",
+                "quotation_to",
+                "party_name",
+                "company",
+                "status",
+                "grand_total",
+                "currency",
+                "modified"
+            ],
             filters=filters,
-            or_filters=or_filters,
-            pluck="name"
+            search=search,
+            search_fields=["name", "party_name", "company", "status", "quotation_to"],
+            sort_by=sort_by,
+            sort_order=sort_order,
+            page=page,
+            page_size=page_size,
+            cursor=cursor,
+            use_cursor=use_cursor
         )
-    )
+    except frappe.ValidationError as e:
+        return api_error(str(e), 400)
 
-    total_pages = (total_count + page_size - 1) // page_size
+    total_count = result["count"]
+    total_pages = result["total_pages"]
     return api_response(
         data={
             "page": page,
             "page_size": page_size,
             "total_records": total_count,
+            "count_mode": result["count_mode"],
             "total_pages": total_pages,
-            "next_page": page + 1 if page < total_pages else None,
+            "next_page": page + 1 if total_pages and page < total_pages else None,
             "prev_page": page - 1 if page > 1 else None,
-            "data": quotations
+            "next_cursor": result["next_cursor"],
+            "data": result["results"]
         },
         message=_("Quotations List Fetched Successfully"),
         status_code=200,
+        etag=True,
         flatten=True
     )
 
@@ -1,6 +1,13 @@
 import frappe
 from frappe import _
-from erpnext_crm_api.api.utils import api_response, api_error
+from erpnext_crm_api.api.utils import (
+    api_response,
+    api_error,
+    get_paginated_data,
+    with_etag,
+    get_doc_etag,
+    not_modified_response
+)
 
 @frappe.whitelist(methods=["POST"])
 def create_sales_invoice(data=None):
@@ -44,11 +51,12 @@ def list_sales_invoices(
     search=None,
     status=None,
     customer=None,
-    company=None
+    company=None,
+    cursor=None,
+    use_cursor=0
 ):
     page = int(page)
     page_size = int(page_size)
-    start = (page - 1) * page_size
 
     # -------------------------
     # AND FILTERS
@@ -62,67 +70,54 @@ def list_sales_invoices(
     if company:
         filters["company"] = company
 
-    # -------------------------
-    # OR FILTERS (SEARCH)
-    # -------------------------
-    or_filters = []
-    if search:
-        or_filters = [
-            ["Sales Invoice", "name", "like", f"%{search}%"],
-            ["Sales Invoice", "customer", "like", f"%{search}%"],
-            ["Sales Invoice", "company", "like", f"%{search}%"],
-            ["Sales Invoice", "currency", "like", f"%{search}%"],
-        ]
-
     # -------------------------
     # DATA QUERY
     # -------------------------
-    data = frappe.get_all(
-        "Sales Invoice",
-        fields=[
-            "name",
-            "posting_date",
-            "due_date",
-            "customer",
-            "company",
-            "grand_total",
-            "currency",
-            "docstatus",
-            "modified"
-        ],
-        filters=filters,
-        or_filters=or_filters,
-        order_by=f"{sort_by} {sort_order}",
-        limit_start=start,
-        limit_page_length=page_size
-    )
-
-    # -------------------------
-    # TOTAL COUNT (OR-safe)
-    # -------------------------
-    total = len(
-        frappe.get_all(
-            "Sales Invoice",
+    try:
+        result = get_paginated_data(
+            doctype="Sales Invoice",
+            fields=[
+                "name",
+                "posting_date",
+                "due_date",
+                "customer",
+                "company",
+                "grand_total",
+                "currency",
+                "docstatus",
+                "modified"
+            ],
             filters=filters,
-            or_filters=or_filters,
-            pluck="name"
+            search=search,
+            search_fields=["name", "customer", "company", "currency"],
+            sort_by=sort_by,
+            sort_order=sort_order,
+            page=page,
+            page_size=page_size,
+            cursor=cursor,
+            use_cursor=use_cursor
         )
-    )
+    except frappe.ValidationError as e:
+        return api_error(str(e), 400)
 
-    total_pages = (total + page_size - 1) // page_size
+    total = result["count"]
+    total_pages = result["total_pages"]
 
     return api_response(
     data={
         "page": page,
         "page_size": page_size,
         "total": total,
+        "count_mode": result["count_mode"],
         "total_pages": total_pages,
-        "next_page": page + 1 if page < total_pages else None,
+        "next_page": page + 1 if total_pages and page < total_pages else None,
         "prev_page": page - 1 if page > 1 else None,
-        "data": data
+        "next_cursor": result["next_cursor"],
+        "data": result["results"]
     },
     message=_("Data fetched successfully"),
     status_code=200,
+    etag=True,
     flatten=True
 )
 
@@ -280,6 +275,12 @@ def get_sales_invoice_by_id(name=None):
         frappe.throw(_("Sales Invoice name is required"))
 
     try:
+        # Client already has this version → 304
+        etag = get_doc_etag("Sales Invoice", name)
+        not_modified = not_modified_response(etag)
+        if not_modified:
+            return not_modified
+
         si = frappe.get_doc("Sales Invoice", name)
 
         return api_response(
@@ -308,7 +309,8 @@ def get_sales_invoice_by_id(name=None):
             },
             message=_("Sales Invoice Fetched Successfully"),
             status_code=200,
-            flatten=True
+            flatten=True,
+            etag=etag or True
         )
 
 
@@ -1,6 +1,13 @@
 import frappe
 from frappe import _
-from erpnext_crm_api.api.utils import api_response, api_error
+from erpnext_crm_api.api.utils import (
+    api_response,
+    api_error,
+    get_paginated_data,
+    with_etag,
+    get_doc_etag,
+    not_modified_response
+)
 
 
 @frappe.whitelist(methods=["POST"])
@@ -163,11 +170,12 @@ def list_sales_orders(
     search=None,
     status=None,
     customer=None,
-    company=None
+    company=None,
+    cursor=None,
+    use_cursor=0
 ):
     page = int(page)
     page_size = int(page_size)
-    start = (page - 1) * page_size
 
     # -------------------------
     # AND FILTERS
@@ -183,69 +191,55 @@ def list_sales_orders(
     if company:
         filters["company"] = company
 
-    # -------------------------
-    # OR FILTERS (SEARCH)
-    # -------------------------
-    or_filters = []
-
-    if search:
-        or_filters = [
-            ["Sales Order", "name", "like", f"%{search}%"],
-            ["Sales Order", "customer", "like", f"%{search}%"],
-            ["Sales Order", "company", "like", f"%{search}%"],
-            ["Sales Order", "status", "like", f"%{search}%"],
-        ]
-
     # -------------------------
     # DATA QUERY
     # -------------------------
-    data = frappe.get_all(
-        "Sales Order",
-        fields=[
-            "name",
-            "transaction_date",
-            "delivery_date",
-            "customer",
-            "company",
-            "status",
-            "grand_total",
-            "currency",
-            "docstatus",
-            "modified"
-        ],
-        filters=filters,
-        or_filters=or_filters,
-        order_by=f"{sort_by} {sort_order}",
-        limit_start=start,
-        limit_page_length=page_size
-    )
-
-    # -------------------------
-    # TOTAL COUNT (OR-safe)
-    # -------------------------
-    total = len(
-        frappe.get_all(
-            "Sales Order",
+    try:
+        result = get_paginated_data(
+            doctype="Sales Order",
+            fields=[
+                "name",
+                "transaction_date",
+                "delivery_date",
+                "customer",
+                "company",
+                "status",
+                "grand_total",
+                "currency",
+                "docstatus",
+                "modified"
+            ],
             filters=filters,
-            or_filters=or_filters,
-            pluck="name"
+            search=search,
+            search_fields=["name", "customer", "company", "status"],
+            sort_by=sort_by,
+            sort_order=sort_order,
+            page=page,
+            page_size=page_size,
+            cursor=cursor,
+            use_cursor=use_cursor
         )
-    )
+    except frappe.ValidationError as e:
+        return api_error(str(e), 400)
 
-    total_pages = (total + page_size - 1) // page_size
+    total = result["count"]
+    total_pages = result["total_pages"]
 
     return api_response(
     data={
         "page": page,
         "page_size": page_size,
         "total": total,
+        "count_mode": result["count_mode"],
         "total_pages": total_pages,
-        "next_page": page + 1 if page < total_pages else None,
+        "next_page": page + 1 if total_pages and page < total_pages else None,
         "prev_page": page - 1 if page > 1 else None,
-        "data": data
+        "next_cursor": result["next_cursor"],
+        "data": result["results"]
     },
     message=_("Data fetched successfully"),
     status_code=200,
+    etag=True,
     flatten=True
 )
 
@@ -331,9 +325,16 @@ def get_sales_order_by_id(name):
     try:
         if not name:
             return api_error("Sales Order name is required",400)
+
+        # Client already has this version → 304
+        etag = get_doc_etag("Sales Order", name)
+        not_modified = not_modified_response(etag)
+        if not_modified:
+            return not_modified
+
         so = frappe.get_doc("Sales Order", name)
 
-        return {
+        return with_etag({
             "status": "success",
             "message":"Sales Order Fetched Successfully",
             "data": {
@@ -411,7 +412,7 @@ def get_sales_order_by_id(name):
                 "created_on": so.creation,
                 "modified_on": so.modified
             }
-        }
+        }, etag)
 
     except frappe.DoesNotExistError:
          return api_error(str(e), 400)
@@ -0,0 +1,226 @@
+import re
+import frappe
+from frappe import _
+from frappe.utils import cint
+from erpnext_crm_api.api.utils import api_response, api_error
+
+
+# ---------------------------------------------------------
+# FULLTEXT SEARCH INDEXES
+# MATCH() columns must be exactly the indexed columns, so the
+# column list is always read back from the installed index.
+# ---------------------------------------------------------
+SEARCH_INDEX_NAME = "crm_api_fulltext"
+
+SEARCH_INDEXES = {
+    "Lead": ["first_name", "last_name", "email_id", "mobile_no", "company_name"],
+    "Opportunity": ["party_name", "contact_email", "contact_mobile", "source", "company"],
+    "Quotation": ["name", "party_name", "company", "status", "quotation_to"],
+    "Customer": ["customer_name", "mobile_no", "email_id"],
+    "User": ["full_name", "email", "username", "mobile_no"],
+}
+
+# Ranked matches used to order a relevance sort; filtering and counting
+# always run over every match
+SEARCH_CANDIDATE_LIMIT = 500
+
+# InnoDB defaults: innodb_ft_min_token_size = 3 and the built-in stopword list
+MIN_TOKEN_LENGTH = 3
+STOPWORDS = {
+    "about", "are", "com", "for", "from", "how", "that", "the", "this",
+    "was", "what", "when", "where", "who", "will", "with", "und", "www"
+}
+
+SEARCH_COLUMNS_CACHE_KEY = "crm_api_search_columns"
+
+
+def ensure_search_indexes():
+    """
+    Create missing FULLTEXT indexes (after_install / after_migrate).
+    """
+    for doctype, columns in SEARCH_INDEXES.items():
+        if not frappe.db.table_exists(doctype):
+            continue
+
+        if get_index_columns(doctype):
+            continue
+
+        columns = [c for c in columns if frappe.db.has_column(doctype, c)]
+        if not columns:
+            continue
+
+        column_sql = ", ".join(f"`{c}`" for c in columns)
+        frappe.db.sql_ddl(
+            f"ALTER TABLE `tab{doctype}` ADD FULLTEXT INDEX `{SEARCH_INDEX_NAME}` ({column_sql})"
+        )
+
+    frappe.cache().delete_key(SEARCH_COLUMNS_CACHE_KEY)
+
+
+def get_index_columns(doctype):
+    """
+    Columns of the installed FULLTEXT index in index order ([] if absent).
+    """
+    rows = frappe.db.sql(
+        f"SHOW INDEX FROM `tab{doctype}` WHERE Key_name = %s",
+        (SEARCH_INDEX_NAME,),
+        as_dict=True
+    )
+    return [r.Column_name for r in sorted(rows, key=lambda r: r.Seq_in_index)]
+
+
+def get_search_columns(doctype):
+    """
+    Cached FULLTEXT column list for doctype ([] when there is no index).
+    """
+    if doctype not in SEARCH_INDEXES:
+        return []
+
+    return frappe.cache().hget(
+        SEARCH_COLUMNS_CACHE_KEY,
+        doctype,
+        generator=lambda: get_index_columns(doctype)
+    ) or []
+
+
+def to_boolean_query(search):
+    """
+    Build a BOOLEAN MODE prefix query (+term* per token).
+    Returns None when a token cannot be served by the index: shorter
+    than the minimum token size, a stopword, or containing digits
+    (phone / ID fragments, usually searched mid-string, not as a prefix).
+    """
+    tokens = re.findall(r"\w+", (search or "").lower())
+    if not tokens:
+        return None
+
+    for token in tokens:
+        if len(token) < MIN_TOKEN_LENGTH or token in STOPWORDS:
+            return None
+        if any(ch.isdigit() for ch in token):
+            return None
+
+    return " ".join(f"+{token}*" for token in tokens)
+
+
+def get_fulltext_query(doctype, search):
+    """
+    (columns, boolean_query) for a FULLTEXT search, or None to fall back to LIKE.
+    """
+    columns = get_search_columns(doctype)
+    if not columns:
+        return None
+
+    boolean_query = to_boolean_query(search)
+    if not boolean_query:
+        return None
+
+    return columns, boolean_query
+
+
+def search_names(doctype, search, limit=SEARCH_CANDIDATE_LIMIT):
+    """
+    Names matching `search` ranked by relevance, as [(name, score)].
+    Returns None if the FULLTEXT index cannot serve this search.
+    """
+    fulltext = get_fulltext_query(doctype, search)
+    if not fulltext:
+        return None
+
+    columns, boolean_query = fulltext
+    match_sql = "MATCH({0}) AGAINST (%(query)s IN BOOLEAN MODE)".format(
+        ", ".join(f"`{c}`" for c in columns)
+    )
+
+    return frappe.db.sql(
+        f"""
+        SELECT name, {match_sql} AS score
+        FROM `tab{doctype}`
+        WHERE {match_sql}
+        ORDER BY score DESC, modified DESC
+        LIMIT %(limit)s
+        """,
+        {"query": boolean_query, "limit": cint(limit)}
+    )
+
+
+def get_match_condition(doctype, search):
+    """
+    MATCH ... AGAINST condition for a WHERE clause (values escaped),
+    or None if the FULLTEXT index cannot serve this search.
+    """
+    fulltext = get_fulltext_query(doctype, search)
+    if not fulltext:
+        return None
+
+    columns, boolean_query = fulltext
+    return "MATCH({0}) AGAINST ({1} IN BOOLEAN MODE)".format(
+        ", ".join(f"`tab{doctype}`.`{c}`" for c in columns),
+        frappe.db.escape(boolean_query, percent=False)
+    )
+
+
+def get_search_filters(doctype, search, search_fields):
+    """
+    Conditions implementing `search` for get_all_where (utils.py).
+
+    Returns (or_filters, conditions):
+    - FULLTEXT: a MATCH ... AGAINST condition matching every hit
+    - fallback: LIKE or_filters over search_fields
+    """
+    match_condition = get_match_condition(doctype, search)
+
+    if match_condition is None:
+        or_filters = [[doctype, field, "like", f"%{search}%"] for field in search_fields]
+        return or_filters, []
+
+    return [], [match_condition]
+
+
+@frappe.whitelist()
+def search_records(doctype=None, search=None, limit=20):
+    """
+    API: Ranked search over Lead / Opportunity / Quotation / Customer / User
+    Prefix match per word; falls back to LIKE when the index is absent
+    """
+    if doctype not in SEARCH_INDEXES:
+        return api_error(f"Search is not supported for {doctype}", 400)
+
+    if not frappe.has_permission(doctype, "read"):
+        return api_error("Not permitted", 403)
+
+    search = (search or "").strip()
+    limit = min(cint(limit) or 20, SEARCH_CANDIDATE_LIMIT)
+
+    if not search:
+        return api_error("search is required", 400)
+
+    ranked = search_names(doctype, search, limit=limit)
+
+    if ranked is None:
+        mode = "like"
+        names = frappe.get_all(
+            doctype,
+            or_filters=[
+                [doctype, field, "like", f"%{search}%"]
+                for field in SEARCH_INDEXES[doctype]
+                if frappe.db.has_column(doctype, field)
+            ],
+            order_by="modified desc",
+            limit_page_length=limit,
+            pluck="name"
+        )
+        results = [{"name": name, "score": None} for name in names]
+    else:
+        mode = "fulltext"
+        results = [{"name": name, "score": score} for name, score in ranked]
+
+    return api_response(
+        data={
+            "doctype": doctype,
+            "search_mode": mode,
+            "data": results
+        },
+        message=_("Search Results Fetched Successfully"),
+        flatten=True
+    )
@@ -1,6 +1,7 @@
 import frappe
 from frappe import _
 from erpnext_crm_api.api.utils import api_response, api_error
+from erpnext_crm_api.api.search import get_fulltext_query
 
 
 @frappe.whitelist(allow_guest=False)
@@ -48,7 +49,15 @@ def get_full_user_list(
         "page_size": page_size
     }
 
-    if search:
+    fulltext = get_fulltext_query("User", search.strip()) if search else None
+
+    if fulltext:
+        columns, boolean_query = fulltext
+        search_condition = """
+            AND MATCH({columns}) AGAINST (%(search)s IN BOOLEAN MODE)
+        """.format(columns=", ".join(f"u.`{c}`" for c in columns))
+        values["search"] = boolean_query
+    elif search:
         search_condition = """
             AND (
                 u.full_name LIKE %(search)s
@@ -116,5 +125,6 @@ def get_full_user_list(
         },
         message=_("User List Fetched Successfully"),
         status_code=200,
+        etag=True,
         flatten=True
     )
\ No newline at end of file
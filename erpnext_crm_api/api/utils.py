@@ -57,13 +57,23 @@
 
 import frappe
 import math
+import json
+import base64
+import hashlib
 from urllib.parse import urlencode
-from frappe import PermissionError
+from werkzeug.wrappers import Response
+from frappe import _, PermissionError
+from frappe.model.db_query import DatabaseQuery
+from frappe.utils import sbool, cint
 
 # ---------------------------------------------------------
 # STANDARD API RESPONSE
 # ---------------------------------------------------------
-def api_response(data=None, message="Success", status_code=200, flatten=False):
+def api_response(data=None, message="Success", status_code=200, flatten=False, etag=None):
+    """
+    etag → True to tag the response with a content hash, or a precomputed
+    ETag (see get_doc_etag). Tagged GET responses honour If-None-Match.
+    """
     frappe.local.response["http_status_code"] = status_code
 
     response = {
@@ -78,6 +88,9 @@ def api_response(data=None, message="Success", status_code=200, flatten=False):
     else:
         response["data"] = data
 
+    if etag:
+        return with_etag(response, etag=None if etag is True else etag)
+
     return response
 
 
@@ -94,6 +107,430 @@ def api_error(message, status_code=403):
     return None
 
 
+# ---------------------------------------------------------
+# INSTRUMENTATION COUNTERS (REDIS HASH, SITE SCOPED)
+# ---------------------------------------------------------
+def incr_counter(name, field, amount=1):
+    """
+    Increment an integer counter field in the redis hash `name`.
+    Counters are best effort and never fail the request.
+    """
+    try:
+        frappe.cache().hincrby(frappe.cache().make_key(name), field, amount)
+    except Exception:
+        pass
+
+
+def get_counters(name):
+    """
+    All counter fields of the redis hash `name` as {field: int}.
+    """
+    raw = frappe.cache().execute_command("HGETALL", frappe.cache().make_key(name)) or {}
+    return {
+        frappe.safe_decode(field): int(value)
+        for field, value in raw.items()
+    }
+
+
+def reset_counters(name):
+    frappe.cache().execute_command("DEL", frappe.cache().make_key(name))
+
+
+# ---------------------------------------------------------
+# ETAG / CONDITIONAL GET
+# ---------------------------------------------------------
+ETAG_STATS_KEY = "crm_api_etag_stats"
+ETAG_SIZE_TTL = 86400
+
+
+def make_etag(*parts):
+    return 'W/"{0}"'.format(hashlib.md5("|".join(map(str, parts)).encode()).hexdigest())
+
+
+def get_doc_etag(doctype, name):
+    """
+    ETag from the document's `modified` (a primary key lookup),
+    so unchanged documents can be answered before they are loaded.
+    """
+    modified = frappe.db.get_value(doctype, name, "modified")
+    if not modified:
+        return None
+
+    return make_etag(doctype, name, modified, frappe.session.user)
+
+
+def is_conditional_request():
+    request = getattr(frappe.local, "request", None)
+    return bool(request) and request.method in ("GET", "HEAD")
+
+
+def etag_matches(etag):
+    header = frappe.get_request_header("If-None-Match") or ""
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or etag in tags
+
+
+def _etag_size_key(etag):
+    return f"crm_api_etag_size:{etag}"
+
+
+def not_modified_response(etag):
+    """
+    304 response if the client's If-None-Match holds `etag`, else None.
+    Bytes saved are counted from the size last sent for that ETag.
+    """
+    if not etag or not is_conditional_request() or not etag_matches(etag):
+        return None
+
+    incr_counter(ETAG_STATS_KEY, "not_modified")
+    incr_counter(ETAG_STATS_KEY, "bytes_saved", cint(frappe.cache().get_value(_etag_size_key(etag))))
+
+    return Response(status=304, headers={"ETag": etag})
+
+
+def with_etag(response, etag=None):
+    """
+    Return `response` as a JSON Response carrying an ETag (content hash
+    unless given), or a 304 when the client already has it.
+    Non GET requests get the plain response back.
+    """
+    if not is_conditional_request():
+        return response
+
+    body = frappe.as_json({"message": response}, indent=None, separators=(",", ":"))
+    etag = etag or make_etag(body)
+
+    not_modified = not_modified_response(etag)
+    if not_modified:
+        return not_modified
+
+    incr_counter(ETAG_STATS_KEY, "full")
+    frappe.cache().set_value(_etag_size_key(etag), len(body), expires_in_sec=ETAG_SIZE_TTL)
+
+    return Response(
+        body,
+        status=frappe.local.response.get("http_status_code") or 200,
+        mimetype="application/json",
+        headers={"ETag": etag, "Cache-Control": "private, no-cache"}
+    )
+
+
+@frappe.whitelist()
+def get_etag_stats(reset=0):
+    """
+    API: Conditional GET counters (System Manager only)
+    full → tagged 200 responses, not_modified → 304s, bytes_saved → body bytes not sent
+    """
+    if "System Manager" not in frappe.get_roles():
+        return api_error("Not permitted", 403)
+
+    counters = get_counters(ETAG_STATS_KEY)
+
+    if sbool(reset):
+        reset_counters(ETAG_STATS_KEY)
+
+    return api_response(
+        data={
+            "full": counters.get("full", 0),
+            "not_modified": counters.get("not_modified", 0),
+            "bytes_saved": counters.get("bytes_saved", 0)
+        },
+        message=_("ETag Stats Fetched Successfully"),
+        flatten=True
+    )
+
+
+# ---------------------------------------------------------
+# GET_ALL WITH RAW SQL CONDITIONS
+# For WHERE clauses frappe filters cannot express (e.g. the
+# FULLTEXT MATCH ... AGAINST condition from search.py).
+# ---------------------------------------------------------
+class ConditionQuery(DatabaseQuery):
+    """
+    DatabaseQuery that ANDs extra SQL conditions to the built filters.
+    Conditions are inserted verbatim, values must already be escaped.
+    """
+
+    def __init__(self, doctype, conditions):
+        super().__init__(doctype)
+        self.extra_conditions = list(conditions)
+
+    def build_conditions(self):
+        super().build_conditions()
+        self.conditions.extend(f"({c})" for c in self.extra_conditions)
+
+
+def get_all_where(doctype, conditions=None, **kwargs):
+    """
+    frappe.get_all plus raw `conditions`; same arguments and defaults
+    (pass ignore_permissions=False for frappe.get_list behaviour).
+    """
+    if not conditions:
+        if kwargs.pop("ignore_permissions", True):
+            return frappe.get_all(doctype, **kwargs)
+        return frappe.get_list(doctype, **kwargs)
+
+    kwargs.setdefault("ignore_permissions", True)
+    kwargs.setdefault("limit_page_length", 0)
+    return ConditionQuery(doctype, conditions).execute(**kwargs)
+
+
+# ---------------------------------------------------------
+# RECORD COUNT (COUNT(*) / TABLE STATISTICS)
+# ---------------------------------------------------------
+def count_records(
+    doctype,
+    filters=None,
+    or_filters=None,
+    estimate_threshold=None,
+    conditions=None,
+    ignore_permissions=True
+):
+    """
+    Count records with a single COUNT(*) query using the same
+    filters / or_filters semantics as frappe.get_all (plus raw
+    `conditions`, see get_all_where). With ignore_permissions=False
+    only records the user can read are counted (frappe.get_list).
+
+    If the query is unfiltered and the table statistics report at least
+    `estimate_threshold` rows, the estimate is returned instead of scanning.
+    The threshold falls back to `crm_api_count_estimate_threshold` in
+    site_config; estimation is disabled when neither is set, and for
+    permission checked counts (the estimate covers the whole table).
+
+    Returns a tuple (count, mode) where mode is "exact" or "estimated".
+    """
+    if estimate_threshold is None:
+        estimate_threshold = frappe.conf.get("crm_api_count_estimate_threshold")
+
+    estimate_threshold = int(estimate_threshold or 0)
+
+    if (
+        estimate_threshold
+        and ignore_permissions
+        and not filters
+        and not or_filters
+        and not conditions
+    ):
+        estimate = get_estimated_count(doctype)
+        if estimate is not None and estimate >= estimate_threshold:
+            return estimate, "estimated"
+
+    result = get_all_where(
+        doctype,
+        conditions,
+        filters=filters,
+        or_filters=or_filters,
+        fields=[f"count(`tab{doctype}`.name) as total_count"],
+        ignore_permissions=ignore_permissions
+    )
+
+    total_count = result[0].get("total_count") if result else 0
+    return int(total_count or 0), "exact"
+
+
+def get_estimated_count(doctype):
+    """
+    Row count estimate from InnoDB table statistics (no table scan).
+    Returns None if statistics are unavailable.
+    """
+    result = frappe.db.sql(
+        """
+        SELECT table_rows
+        FROM information_schema.tables
+        WHERE table_schema = DATABASE()
+          AND table_name = %s
+        """,
+        (f"tab{doctype}",)
+    )
+
+    if not result or result[0][0] is None:
+        return None
+
+    return int(result[0][0])
+
+
+# ---------------------------------------------------------
+# KEYSET (CURSOR) PAGINATION HELPERS
+# ---------------------------------------------------------
+# Standard columns that are never NULL: the =, <, > seek never matches
+# NULL, so only these can be cursor sort keys.
+CURSOR_SORT_FIELDS = ["name", "creation", "modified", "owner", "modified_by", "idx"]
+
+def encode_cursor(sort_by, sort_order, row):
+    """
+    Opaque cursor pointing just after `row` in (sort_by, name) order.
+    """
+    payload = {
+        "sort_by": sort_by,
+        "sort_order": sort_order,
+        "value": row.get(sort_by),
+        "name": row.get("name")
+    }
+    raw = frappe.as_json(payload, indent=None).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor, sort_by, sort_order):
+    """
+    Decode a cursor produced by encode_cursor for the same sort.
+    Returns (value, name); raises frappe.ValidationError if it is invalid.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+    except Exception:
+        raise frappe.ValidationError(_("Invalid cursor"))
+
+    if (
+        not isinstance(payload, dict)
+        or payload.get("sort_by") != sort_by
+        or payload.get("sort_order") != sort_order
+        or not payload.get("name")
+    ):
+        raise frappe.ValidationError(_("Cursor does not match the requested sort"))
+
+    return payload.get("value"), payload["name"]
+
+
+def as_filter_list(doctype, filters):
+    """
+    Normalize dict / list filters to a list of [doctype, field, operator, value]
+    so extra conditions on the same field can be appended.
+    """
+    if not filters:
+        return []
+
+    if isinstance(filters, dict):
+        filter_list = []
+        for field, value in filters.items():
+            if isinstance(value, (list, tuple)) and len(value) == 2 and isinstance(value[0], str):
+                filter_list.append([doctype, field, value[0], value[1]])
+            else:
+                filter_list.append([doctype, field, "=", value])
+        return filter_list
+
+    return [list(f) for f in filters]
+
+
+def get_rows_after_cursor(
+    doctype,
+    fields,
+    filters,
+    or_filters,
+    sort_by,
+    sort_order,
+    cursor_value,
+    cursor_name,
+    limit,
+    conditions=None
+):
+    """
+    Seek the next `limit` rows after (cursor_value, cursor_name) without OFFSET.
+
+    The seek is split in two index-friendly queries: rows that tie with the
+    cursor on sort_by (ordered by name), then rows strictly past it.
+    Ordering is always (sort_by, name), so concurrent inserts never shift
+    or repeat rows across pages.
+    """
+    op = "<" if sort_order == "desc" else ">"
+    order_by = f"{sort_by} {sort_order}, name {sort_order}"
+    base_filters = as_filter_list(doctype, filters)
+
+    rows = []
+    if cursor_name is not None:
+        if sort_by == "name":
+            base_filters.append([doctype, "name", op, cursor_name])
+        else:
+            rows = get_all_where(
+                doctype,
+                conditions,
+                fields=fields,
+                filters=base_filters + [
+                    [doctype, sort_by, "=", cursor_value],
+                    [doctype, "name", op, cursor_name]
+                ],
+                or_filters=or_filters,
+                order_by=order_by,
+                limit_page_length=limit
+            )
+            base_filters.append([doctype, sort_by, op, cursor_value])
+
+    if len(rows) < limit:
+        rows += get_all_where(
+            doctype,
+            conditions,
+            fields=fields,
+            filters=base_filters,
+            or_filters=or_filters,
+            order_by=order_by,
+            limit_page_length=limit - len(rows)
+        )
+
+    return rows
+
+
+def get_rows_by_relevance(doctype, fields, filters, or_filters, conditions, ranked_names, start, page_size):
+    """
+    One page of rows in FULLTEXT rank order.
+
+    ranked_names is the capped, ranked candidate list from search.py and
+    only decides the order: filtered candidates come first by score, every
+    other match follows by modified desc. Candidates are filtered with a
+    name-only query and only the page's rows are fetched with all fields.
+    """
+    ranked = []
+    if ranked_names:
+        matched = set(get_all_where(
+            doctype,
+            conditions,
+            filters=as_filter_list(doctype, filters) + [[doctype, "name", "in", ranked_names]],
+            or_filters=or_filters,
+            pluck="name"
+        ))
+        ranked = [n for n in ranked_names if n in matched]
+
+    fetch_fields = list(fields or ["name"])
+    strip_name = "*" not in fetch_fields and "name" not in fetch_fields
+    if strip_name:
+        fetch_fields.append("name")
+
+    data = []
+    page_names = ranked[start:start + page_size]
+    if page_names:
+        rows = frappe.get_all(
+            doctype,
+            fields=fetch_fields,
+            filters=[[doctype, "name", "in", page_names]],
+            limit_page_length=page_size
+        )
+        by_name = {row.name: row for row in rows}
+        data = [by_name[name] for name in page_names if name in by_name]
+
+    # the rest of the page comes from matches outside the ranked candidates
+    if len(data) < page_size:
+        rest_filters = as_filter_list(doctype, filters)
+        if ranked:
+            rest_filters.append([doctype, "name", "not in", ranked])
+
+        data += get_all_where(
+            doctype,
+            conditions,
+            fields=fetch_fields,
+            filters=rest_filters,
+            or_filters=or_filters,
+            order_by="modified desc",
+            limit_start=max(start - len(ranked), 0),
+            limit_page_length=page_size - len(data)
+        )
+
+    if strip_name:
+        for row in data:
+            row.pop("name", None)
+
+    return data
+
+
 # ---------------------------------------------------------
 # GENERIC PAGINATED LIST HELPER
 # ---------------------------------------------------------
@@ -110,8 +547,28 @@ def get_paginated_data(
     is_pagination=True,
     base_url=None,
     extra_params=None,
-    or_filters=None
+    or_filters=None,
+    count_estimate_threshold=None,
+    cursor=None,
+    use_cursor=False
 ):
+    """
+    Paginated get_all with search, sort and a single COUNT(*).
+
+    Offset mode (default) pages with page / page_size. Cursor mode is used
+    when `use_cursor` is set or a `cursor` is passed: rows are ordered by
+    (sort_by, name), the next page is fetched with a WHERE seek instead of
+    OFFSET and the response carries an opaque `next_cursor`.
+    sort_by must be one of CURSOR_SORT_FIELDS (non-null) in cursor mode,
+    and the COUNT(*) only runs for the first cursor page (count is None
+    once a cursor is passed).
+
+    Search uses the FULLTEXT index from search.py when it is installed
+    (falling back to LIKE); sort_by="relevance" orders by match score.
+
+    `fields` may also be a preset name or comma separated string, resolved
+    against the doctype whitelist in projection.py.
+    """
     filters = filters or {}
     or_filters = or_filters or []
     extra_params = extra_params or {}
@@ -119,14 +576,32 @@ def get_paginated_data(
     page = int(page)
     page_size = int(page_size)
     start = (page - 1) * page_size
+    use_cursor = bool(cursor) or sbool(use_cursor)
 
     # -----------------------
     # SEARCH
     # -----------------------
+    # FULLTEXT MATCH condition when available (see search.py), LIKE otherwise
+    conditions = []
     if search and search_fields:
-        search = search.strip()
-        for field in search_fields:
-            or_filters.append([doctype, field, "like", f"%{search}%"])
+        from erpnext_crm_api.api.search import get_search_filters
+        search_or_filters, conditions = get_search_filters(
+            doctype, search.strip(), search_fields
+        )
+        or_filters.extend(search_or_filters)
+
+    # "relevance" only applies to an indexed search
+    sort_by_relevance = sort_by == "relevance" and bool(conditions)
+    if sort_by == "relevance" and not sort_by_relevance:
+        sort_by = "modified"
+
+    if sort_by_relevance and use_cursor:
+        raise frappe.ValidationError(_("Cursor pagination is not supported with relevance sort"))
+
+    if use_cursor and sort_by not in CURSOR_SORT_FIELDS:
+        raise frappe.ValidationError(
+            _("Cursor pagination requires sort_by to be one of: {0}").format(", ".join(CURSOR_SORT_FIELDS))
+        )
 
     # -----------------------
     # SORT VALIDATION
@@ -134,34 +609,100 @@ def get_paginated_data(
     sort_order = "desc" if sort_order.lower() == "desc" else "asc"
 
     # -----------------------
-    # COUNT (FAST)
+    # FIELD PROJECTION (PRESET / COMMA LIST)
+    # -----------------------
+    if isinstance(fields, str):
+        from erpnext_crm_api.api.projection import resolve_fields
+        fields = resolve_fields(doctype, fields)
+
     # -----------------------
-    total_count = len(
-        frappe.get_all(
+    # COUNT (SINGLE COUNT(*) QUERY)
+    # skipped for later cursor pages: keyset pages cost the same at any depth
+    # -----------------------
+    if cursor:
+        total_count, count_mode = None, "skipped"
+    else:
+        total_count, count_mode = count_records(
             doctype,
             filters=filters,
             or_filters=or_filters,
-            pluck="name"
+            estimate_threshold=count_estimate_threshold,
+            conditions=conditions
         )
-    )
 
     # -----------------------
     # DATA FETCH
     # -----------------------
-    data = frappe.get_all(
-        doctype,
-        fields=fields,
-        filters=filters,
-        or_filters=or_filters,
-        order_by=f"{sort_by} {sort_order}",
-        limit_start=start,
-        limit_page_length=page_size
-    )
+    next_cursor = None
+
+    if use_cursor:
+        cursor_value, cursor_name = (
+            decode_cursor(cursor, sort_by, sort_order) if cursor else (None, None)
+        )
+
+        # sort key and name are needed to build the next cursor
+        fetch_fields = list(fields or ["name"])
+        added_fields = []
+        if "*" not in fetch_fields:
+            for key in (sort_by, "name"):
+                if key not in fetch_fields:
+                    fetch_fields.append(key)
+                    added_fields.append(key)
+
+        data = get_rows_after_cursor(
+            doctype,
+            fetch_fields,
+            filters,
+            or_filters,
+            sort_by,
+            sort_order,
+            cursor_value,
+            cursor_name,
+            page_size + 1,
+            conditions=conditions
+        )
+
+        has_more = len(data) > page_size
+        data = data[:page_size]
+
+        if has_more and data:
+            next_cursor = encode_cursor(sort_by, sort_order, data[-1])
+
+        for row in data:
+            for key in added_fields:
+                row.pop(key, None)
+    elif sort_by_relevance:
+        from erpnext_crm_api.api.search import search_names
+        ranked_names = [r[0] for r in search_names(doctype, search.strip()) or []]
+        data = get_rows_by_relevance(
+            doctype,
+            fields,
+            filters,
+            or_filters,
+            conditions,
+            ranked_names,
+            start,
+            page_size
+        )
+    else:
+        data = get_all_where(
+            doctype,
+            conditions,
+            fields=fields,
+            filters=filters,
+            or_filters=or_filters,
+            order_by=f"{sort_by} {sort_order}",
+            limit_start=start,
+            limit_page_length=page_size
+        )
 
     if not is_pagination:
         return data
 
-    total_pages = math.ceil(total_count / page_size) if page_size else 1
+    if total_count is None:
+        total_pages = None
+    else:
+        total_pages = math.ceil(total_count / page_size) if page_size else 1
 
     def build_url(p):
         if not base_url:
@@ -169,10 +710,25 @@ def get_paginated_data(
         params = {**extra_params, "page": p, "page_size": page_size}
         return f"{base_url}?{urlencode(params)}"
 
+    def build_cursor_url(c):
+        if not base_url:
+            return None
+        params = {**extra_params, "cursor": c, "page_size": page_size}
+        return f"{base_url}?{urlencode(params)}"
+
+    if use_cursor:
+        next_url = build_cursor_url(next_cursor) if next_cursor else None
+        previous_url = None
+    else:
+        next_url = build_url(page + 1) if page < total_pages else None
+        previous_url = build_url(page - 1) if page > 1 else None
+
     return {
         "count": total_count,
+        "count_mode": count_mode,
         "total_pages": total_pages,
-        "next": build_url(page + 1) if page < total_pages else None,
-        "previous": build_url(page - 1) if page > 1 else None,
+        "next": next_url,
+        "previous": previous_url,
+        "next_cursor": next_cursor,
         "results": data
     }
@@ -0,0 +1,8 @@
+// Copyright (c) 2026, Dnyaneshwari and contributors
+// For license information, please see license.txt
+
+// frappe.ui.form.on("CRM Lead Dedup Key", {
+// 	refresh(frm) {
+
+// 	},
+// });
@@ -83,7 +83,8 @@ app_license = "mit"
 # ------------
 
 # before_install = "erpnext_crm_api.install.before_install"
-# after_install = "erpnext_crm_api.install.after_install"
+after_install = "erpnext_crm_api.install.after_install"
+after_migrate = "erpnext_crm_api.install.after_migrate"
 
 # Uninstallation
 # ------------
@@ -249,19 +250,68 @@ app_license = "mit"
 
 doc_events = {
     "Event": {
+        "validate": "erpnext_crm_api.api.event_reminder.set_reminder_time",
         "on_update": "erpnext_crm_api.api.event_reminder.handle_event_reschedule"
     },
+    "Employee": {
+        "on_update": "erpnext_crm_api.api.event_reminder.handle_employee_reminder_change",
+        "after_delete": "erpnext_crm_api.api.event_reminder.handle_employee_delete"
+    },
     "ToDo": {
         "after_insert": "erpnext_crm_api.api.custom_notification.handle_assignment_email"
+    },
+    "Lead": {
+        "on_update": [
+            "erpnext_crm_api.api.crm_rollup.update_rollup",
+            "erpnext_crm_api.api.lead_dedup.update_dedup_keys"
+        ],
+        "on_trash": [
+            "erpnext_crm_api.api.crm_rollup.update_rollup",
+            "erpnext_crm_api.api.lead_dedup.update_dedup_keys"
+        ],
+        "after_rename": "erpnext_crm_api.api.lead_dedup.update_dedup_keys"
+    },
+    "Opportunity": {
+        "on_update": "erpnext_crm_api.api.crm_rollup.update_rollup",
+        "on_trash": "erpnext_crm_api.api.crm_rollup.update_rollup"
     }
 }
 
+# Dedup keys are removed by the Lead on_trash hook (api/lead_dedup.py)
+ignore_links_on_delete = ["CRM Lead Dedup Key", "CRM Daily Rollup"]
+
+# Master data doctypes served from in-memory / cached lookups
+_master_doctypes = [
+    "Country", "Territory", "Industry Type", "Language", "Campaign",
+    "Market Segment", "Sales Stage", "Opportunity Type", "Gender", "Customer Group"
+]
+
+for _doctype in _master_doctypes:
+    for _event in ("on_update", "on_trash", "after_rename"):
+        doc_events.setdefault(_doctype, {}).setdefault(_event, []).append(
+            "erpnext_crm_api.api.autocomplete.invalidate_autocomplete"
+        )
+
+# Cached master list responses (api/master_cache.py)
+for _doctype in _master_doctypes + ["CRM Master", "Company"]:
+    for _event in ("on_update", "on_trash", "after_rename"):
+        doc_events.setdefault(_doctype, {}).setdefault(_event, []).append(
+            "erpnext_crm_api.api.master_cache.invalidate_master_cache"
+        )
+
 scheduler_events = {
     "cron": {
         "*/1 * * * *": [
             "erpnext_crm_api.api.event_reminder.send_configurable_event_reminders"
+        ],
+        "*/5 * * * *": [
+            "erpnext_crm_api.api.crm_dashboard.precompute_dashboards",
+            "erpnext_crm_api.api.batch_operation.resume_stalled_batches"
         ]
-    }
+    },
+    "daily_long": [
+        "erpnext_crm_api.api.crm_rollup.rebuild_rollup"
+    ]
 }
 
 fixtures = [
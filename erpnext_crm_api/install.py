@@ -0,0 +1,20 @@
+from erpnext_crm_api.api.search import ensure_search_indexes
+from erpnext_crm_api.api.indexes import ensure_indexes
+from erpnext_crm_api.api.crm_rollup import ensure_rollup
+from erpnext_crm_api.api.event_reminder import backfill_reminder_times
+from erpnext_crm_api.api.lead_dedup import ensure_dedup_index
+
+
+def after_install():
+    ensure_search_indexes()
+    ensure_indexes()
+    ensure_rollup()
+    ensure_dedup_index()
+
+
+def after_migrate():
+    ensure_search_indexes()
+    ensure_indexes()
+    ensure_rollup()
+    backfill_reminder_times()
+    ensure_dedup_index()
@@ -0,0 +1,8 @@
+import frappe
+from erpnext_crm_api.api.crm_rollup import enqueue_rebuild
+
+
+def execute():
+    # rollup keys now include the owner dimension
+    if frappe.db.table_exists("CRM Daily Rollup"):
+        enqueue_rebuild()